@@ -157,6 +157,33 @@ class KEESOAPITester:
         )
         return success
 
+    def test_bulk_announcements(self):
+        """Test bulk create and delete of announcements"""
+        stamp = datetime.now().strftime('%H%M%S')
+        operations = [
+            {"op": "create", "data": {"title": f"Toplu Duyuru {stamp} {i}", "content": "Toplu test duyurusu.", "category": "Genel Duyurular"}}
+            for i in range(3)
+        ]
+        success, response = self.run_test(
+            "Bulk Create Announcements",
+            "POST",
+            "/api/announcements/bulk",
+            200,
+            data={"ordered": False, "operations": operations}
+        )
+        if not success:
+            return False
+        print(f"   ✓ Summary: {response.get('summary')}")
+        ids = [r['id'] for r in response.get('results', []) if r.get('status') == 'created']
+        success, response = self.run_test(
+            "Bulk Delete Announcements",
+            "POST",
+            "/api/announcements/bulk",
+            200,
+            data={"ordered": False, "operations": [{"op": "delete", "id": i} for i in ids]}
+        )
+        return success and response.get('summary', {}).get('deleted') == len(ids)
+
     def test_get_documents(self):
         """Test getting documents"""
         success, response = self.run_test(
@@ -284,6 +311,18 @@ class KEESOAPITester:
         )
         return success
 
+    def test_site_search(self):
+        """Test site-wide search"""
+        success, response = self.run_test(
+            "Site Search",
+            "GET",
+            "/api/search?q=Eğitim",
+            200
+        )
+        if success:
+            print(f"   ✓ {response.get('total', 0)} results")
+        return success
+
     def test_get_trainings(self):
         """Test getting trainings"""
         success, response = self.run_test(
@@ -332,6 +371,31 @@ class KEESOAPITester:
             print(f"   ✓ Found {len(response)} board members")
         return success
 
+    def test_get_home(self):
+        """Test homepage aggregate"""
+        success, response = self.run_test(
+            "Get Homepage",
+            "GET",
+            "/api/home",
+            200
+        )
+        if success:
+            print(f"   ✓ {len(response.get('announcements', []))} announcements, {len(response.get('visits', []))} visits")
+        return success
+
+    def test_index_drift(self):
+        """Test index drift report"""
+        success, response = self.run_test(
+            "Get Index Drift",
+            "GET",
+            "/api/admin/indexes",
+            200
+        )
+        if success:
+            out_of_sync = [name for name, state in response.items() if not state.get('in_sync')]
+            print(f"   ✓ {len(response) - len(out_of_sync)}/{len(response)} collections in sync")
+        return success
+
 def main():
     print("=" * 60)
     print("KEESO API Testing Suite")
@@ -366,17 +430,20 @@ def main():
     tester.test_get_announcements()
     tester.test_announcements_with_filters()
     tester.test_announcements_with_search()
+    tester.test_site_search()
     
     success, announcement_id = tester.test_create_announcement()
     if success and announcement_id:
         tester.test_get_announcement_by_id(announcement_id)
         tester.test_update_announcement(announcement_id)
         tester.test_delete_announcement(announcement_id)
+    tester.test_bulk_announcements()
     
     # Test 4: Other Endpoints
     print("\n" + "=" * 60)
     print("PHASE 4: Other Endpoints")
     print("=" * 60)
+    tester.test_get_home()
     tester.test_get_documents()
     tester.test_get_visits()
     tester.test_get_payments()
@@ -387,6 +454,7 @@ def main():
     tester.test_get_press()
     tester.test_get_condolences()
     tester.test_get_board_members()
+    tester.test_index_drift()
     
     # Test 5: Public Forms
     print("\n" + "=" * 60)
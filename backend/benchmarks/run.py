@@ -0,0 +1,240 @@
+"""
+KEESO API benchmark suite.
+
+Drives the FastAPI app in-process over httpx's ASGI transport, so results
+measure the application and the database rather than the network. The
+database is an in-memory mongomock stand-in by default, or a real local
+MongoDB with --mongo-url (a throwaway database is created and dropped).
+
+Each scenario records requests per second and latency percentiles. Results
+are written as JSON and compared against a stored baseline; a scenario
+regresses when its throughput drops, or its p95 latency grows, by more than
+--tolerance.
+
+Usage:
+    python benchmarks/run.py                       # run, compare to baseline.json
+    python benchmarks/run.py --save-baseline       # run and store as the new baseline
+    python benchmarks/run.py --mongo-url mongodb://localhost:27017 --scenario home
+    python benchmarks/run.py --no-response-cache    # measure the database path
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_RESULTS_DIR = BENCH_DIR / "results"
+
+ADMIN_EMAIL = "admin@keeso.gov.tr"
+ADMIN_PASSWORD = "admin123"
+# Small but well-formed PDF body for the upload scenario
+SAMPLE_PDF = b"%PDF-1.4\n" + b"BT /F1 12 Tf 72 712 Td (KEESO benchmark) Tj ET\n" * 200 + b"%%EOF\n"
+
+class Scenario:
+    def __init__(self, name: str, method: str, path: str, requests: int, concurrency: int, **kwargs):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.requests = requests
+        self.concurrency = concurrency
+        self.kwargs = kwargs
+
+    def request_kwargs(self, index: int) -> dict:
+        kwargs = dict(self.kwargs)
+        if "files" in kwargs:
+            # A new body each time, so content-addressed dedup does not turn
+            # every upload after the first into a no-op
+            name, content, content_type = kwargs["files"]["file"]
+            kwargs["files"] = {"file": (name, content + f"% {index}\n".encode(), content_type)}
+        return kwargs
+
+def build_scenarios(scale: float) -> list:
+    def n(count):
+        return max(1, int(count * scale))
+    return [
+        Scenario("announcements_list", "GET", "/api/announcements?limit=20", n(2000), 16),
+        Scenario("announcements_category", "GET", "/api/announcements?category=Eğitimler&limit=20", n(2000), 16),
+        Scenario("announcements_search", "GET", "/api/announcements?search=Seminer&limit=20", n(500), 8),
+        Scenario("home", "GET", "/api/home", n(2000), 16),
+        Scenario("sitemap", "GET", "/api/sitemap.xml", n(1000), 16),
+        Scenario("login", "POST", "/api/auth/login", n(40), 4, json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD}),
+        Scenario("upload", "POST", "/api/upload", n(200), 8, files={"file": ("belge.pdf", SAMPLE_PDF, "application/pdf")}),
+    ]
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+async def run_scenario(http, scenario: Scenario, warmup: int) -> dict:
+    for index in range(warmup):
+        await http.request(scenario.method, scenario.path, **scenario.request_kwargs(-index - 1))
+
+    latencies = []
+    errors = 0
+    counter = iter(range(scenario.requests))
+
+    async def client_loop():
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            response = await http.request(scenario.method, scenario.path, **scenario.request_kwargs(index))
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(scenario.concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "method": scenario.method,
+        "path": scenario.path,
+        "requests": len(latencies),
+        "concurrency": scenario.concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return a list of human-readable regressions"""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {current['rps']} req/s vs baseline {previous['rps']} req/s")
+        if current["latency_ms"]["p95"] > previous["latency_ms"]["p95"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['latency_ms']['p95']} ms vs baseline {previous['latency_ms']['p95']} ms")
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: {current['errors']} errors vs baseline {previous['errors']}")
+    return regressions
+
+async def main_async(args) -> int:
+    # Settings the server reads at import time
+    os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="keeso_bench_uploads_"))
+    os.environ["JOB_INLINE_WORKER"] = "false"
+    os.environ.setdefault("SLOW_QUERY_MS", "1000000")
+    sys.path.insert(0, str(BENCH_DIR.parent))
+    import httpx
+    import server
+
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        server.client = AsyncIOMotorClient(args.mongo_url)
+        database = f"keeso_bench_{os.getpid()}"
+        stand_in = "mongodb"
+    else:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            print("mongomock-motor is required for the in-memory stand-in (or pass --mongo-url)")
+            return 2
+        server.client = AsyncMongoMockClient()
+        database = "keeso_bench"
+        stand_in = "mongomock"
+    server.db = server.client[database]
+
+    if args.no_response_cache:
+        # Every read goes through to the database
+        server.response_cache.max_entries = 0
+
+    import generate_dataset
+    for name, count in (("announcements", args.announcements), ("visits", args.visits)):
+        await generate_dataset.load_collection(name, count, args.seed, batch_size=1000, parallel=1)
+    await server.startup_event()
+    await server.rebuild_sitemap()
+    await server.rebuild_search_index()
+
+    selected = [s for s in build_scenarios(args.scale) if not args.scenario or s.name in args.scenario]
+    results = {
+        "created_at": datetime.utcnow().isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "stand_in": stand_in,
+        "response_cache": not args.no_response_cache,
+        "seed": args.seed,
+        "dataset": {"announcements": args.announcements, "visits": args.visits},
+        "scenarios": {},
+    }
+    transport = httpx.ASGITransport(app=server.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            for scenario in selected:
+                result = await run_scenario(http, scenario, args.warmup)
+                results["scenarios"][scenario.name] = result
+                latency = result["latency_ms"]
+                print(f"{scenario.name:<24} {result['rps']:>9.1f} req/s  p50 {latency['p50']:>8.2f} ms  "
+                      f"p95 {latency['p95']:>8.2f} ms  p99 {latency['p99']:>8.2f} ms  errors {result['errors']}")
+    finally:
+        await server.shutdown_event()
+        if args.mongo_url:
+            await server.client.drop_database(database)
+
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"{datetime.utcnow():%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"\nResults written to {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print("No baseline to compare against (run with --save-baseline)")
+        return 0
+    regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    print(f"\n✅ No regressions beyond {args.tolerance:.0%} against {baseline_path}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="KEESO API benchmark suite")
+    parser.add_argument("--mongo-url", help="Benchmark against a real MongoDB instead of the in-memory stand-in")
+    parser.add_argument("--scenario", action="append", help="Run only this scenario (repeatable)")
+    parser.add_argument("--no-response-cache", action="store_true", help="Disable the in-process response cache")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every scenario's request count")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--announcements", type=int, default=2000)
+    parser.add_argument("--visits", type=int, default=200)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+if __name__ == "__main__":
+    main()
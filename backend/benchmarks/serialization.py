@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: rendering a 50-item announcements page.
+
+Compares the old response path (serialize_doc converting each top-level
+field, then FastAPI's jsonable_encoder and the stdlib JSONResponse) with
+the current one (serialize_doc renaming `_id`, then BSONResponse).
+
+Usage: python benchmarks/serialization.py [--items 50] [--rounds 2000]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from server import BSONResponse, create_excerpt, serialize_doc
+
+def legacy_serialize_doc(doc):
+    """serialize_doc as it was before BSONResponse"""
+    if not doc:
+        return doc
+    if "_id" in doc:
+        doc["id"] = str(doc["_id"])
+        del doc["_id"]
+    for key, value in doc.items():
+        if isinstance(value, datetime):
+            doc[key] = value.isoformat()
+        elif isinstance(value, ObjectId):
+            doc[key] = str(value)
+    return doc
+
+def make_page(items: int):
+    now = datetime.utcnow()
+    page = []
+    for i in range(items):
+        content = f"Kayseri Emlakçılar Odası duyurusu {i}. " * 40
+        page.append({
+            "_id": ObjectId(),
+            "title": f"Üyelerimize önemli duyuru {i}",
+            "content": content,
+            "excerpt": create_excerpt(content),
+            "category": "Genel Duyurular",
+            "slug": f"uyelerimize-onemli-duyuru-{i}",
+            "cover_image": f"/uploads/{i:064x}.jpg",
+            "published_at": now - timedelta(hours=i),
+            "created_at": now - timedelta(hours=i),
+        })
+    return page
+
+def legacy_render(page):
+    body = {"items": [legacy_serialize_doc(dict(d)) for d in page], "total": len(page), "exact": True, "next_cursor": None}
+    return JSONResponse(jsonable_encoder(body)).body
+
+def bson_render(page):
+    body = {"items": [serialize_doc(dict(d)) for d in page], "total": len(page), "exact": True, "next_cursor": None}
+    return BSONResponse(body).body
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    page = make_page(args.items)
+    results = {}
+    for name, render in (("legacy", legacy_render), ("bson", bson_render)):
+        seconds = min(timeit.repeat(lambda: render(page), number=args.rounds, repeat=3))
+        results[name] = seconds / args.rounds * 1e6
+        print(f"{name:>7}: {results[name]:8.1f} µs/page  ({len(render(page))} bytes)")
+    print(f"speedup: {results['legacy'] / results['bson']:.1f}x")
+
+if __name__ == "__main__":
+    main()
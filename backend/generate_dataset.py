@@ -0,0 +1,360 @@
+"""
+KEESO synthetic dataset generator
+
+Streams realistic Turkish-language documents for every content collection
+into MongoDB with batched insert_many, for capacity testing and benchmarks.
+Output is fully determined by --seed and the sizes (ObjectIds included), so
+two runs with the same arguments produce the same database.
+
+    python generate_dataset.py --scale 1.0 --seed 42        # 1M announcements, 200k contacts, ...
+    python generate_dataset.py --scale 0.01 --drop
+    python generate_dataset.py --count announcements=50000 --count contacts=0
+
+Counters, the search index, collection versions and indexes are brought up
+to date at the end, so the API serves the new data correctly without a
+restart.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator
+
+from bson import ObjectId
+
+import server
+from server import create_slug, create_excerpt
+
+# Document counts at --scale 1.0
+BASE_COUNTS = {
+    "announcements": 1_000_000,
+    "contacts": 200_000,
+    "membership_applications": 100_000,
+    "press": 50_000,
+    "condolences": 30_000,
+    "visits": 20_000,
+    "documents": 20_000,
+    "trainings": 10_000,
+    "board_members": 30,
+    "payments": 10,
+}
+
+CATEGORIES = ["Genel Duyurular", "Eğitimler", "Mevzuat", "Etkinlikler", "Önemli Bilgilendirmeler"]
+FIRST_NAMES = ["Ahmet", "Mehmet", "Ayşe", "Fatma", "Mustafa", "Emine", "Ali", "Hatice", "Hüseyin", "Zeynep",
+               "İbrahim", "Elif", "Hasan", "Şerife", "Osman", "Gülşen", "Yusuf", "Özlem", "Murat", "Çiğdem"]
+LAST_NAMES = ["Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Yıldırım", "Öztürk", "Aydın", "Özdemir",
+              "Arslan", "Doğan", "Kılıç", "Aslan", "Çetin", "Kara", "Koç", "Kurt", "Özkan", "Şimşek"]
+DISTRICTS = ["Melikgazi", "Kocasinan", "Talas", "Hacılar", "İncesu", "Develi", "Bünyan", "Yahyalı", "Pınarbaşı", "Tomarza"]
+STREETS = ["Atatürk Bulvarı", "Cumhuriyet Caddesi", "Sivas Caddesi", "Talas Caddesi", "Osman Kavuncu Bulvarı",
+           "Mustafa Kemal Paşa Bulvarı", "Kocasinan Bulvarı", "Tekin Sokak", "Gevher Nesibe Caddesi"]
+SUBJECTS = ["emlak danışmanlığı", "kira sözleşmeleri", "tapu işlemleri", "yetki belgesi", "mesleki eğitim",
+            "aidat ödemeleri", "imar mevzuatı", "konut satışları", "ticari gayrimenkul", "değerleme raporları"]
+TITLE_TEMPLATES = [
+    "{subject} hakkında üyelerimize önemli duyuru",
+    "{subject} semineri {district} ilçesinde yapılacak",
+    "{subject} ile ilgili yeni düzenleme yürürlüğe girdi",
+    "Odamızdan {subject} konusunda bilgilendirme",
+    "{district} bölgesinde {subject} toplantısı",
+    "{subject} başvuruları için son tarih açıklandı",
+]
+SENTENCES = [
+    "Kayseri Emlakçılar Esnaf ve Sanatkârlar Odası olarak üyelerimizi bilgilendirmek isteriz.",
+    "Konuya ilişkin ayrıntılı bilgi oda sekreterliğinden temin edilebilir.",
+    "Toplantıya tüm üyelerimizin katılımı önemle rica olunur.",
+    "Yeni düzenleme ile birlikte sözleşmelerde ek belgeler talep edilecektir.",
+    "Başvurular mesai saatleri içerisinde şahsen veya elektronik ortamda yapılabilir.",
+    "Mesleki yeterlilik belgesi bulunmayan işletmeler için süre uzatılmıştır.",
+    "Gayrimenkul alım satım süreçlerinde tapu müdürlüğü randevusu zorunludur.",
+    "Eğitim sonunda katılımcılara sertifika verilecektir.",
+    "Odamız yönetim kurulu konuyu gündemine almış ve gerekli kararları almıştır.",
+    "Üyelerimizin aidat borçlarını yıl sonuna kadar ödemeleri gerekmektedir.",
+]
+PRESS_SOURCES = ["Kayseri Olay", "Kayseri Haber", "Anadolu Ajansı", "Erciyes Gazetesi", "Kayseri Gündem", "Haber Türk"]
+POSITIONS = ["Başkan", "Başkan Yardımcısı", "Sayman", "Sekreter", "Üye"]
+RELATIONS = ["babası", "annesi", "eşi", "kardeşi", "oğlu", "kızı", None]
+PAYMENT_TITLES = ["Yıllık Aidat", "Kayıt Ücreti", "Eğitim Ücreti", "Belge Yenileme", "Seminer Katılımı"]
+START_DATE = datetime(2015, 1, 1)
+END_DATE = datetime(2025, 12, 31)
+
+class DocumentFactory:
+    """Deterministic document source; one instance per collection"""
+    def __init__(self, seed: int, collection: str):
+        self.rng = random.Random(f"{seed}:{collection}")
+
+    def object_id(self, created_at: datetime) -> ObjectId:
+        # Timestamp from the document date, remaining 8 bytes from the seed
+        return ObjectId(int(created_at.timestamp()).to_bytes(4, "big") + self.rng.getrandbits(64).to_bytes(8, "big"))
+
+    def moment(self) -> datetime:
+        span = (END_DATE - START_DATE).total_seconds()
+        return START_DATE + timedelta(seconds=int(self.rng.random() * span))
+
+    def person(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def paragraph(self, sentences: int) -> str:
+        return " ".join(self.rng.choice(SENTENCES) for _ in range(sentences))
+
+    def title(self) -> str:
+        template = self.rng.choice(TITLE_TEMPLATES)
+        text = template.format(subject=self.rng.choice(SUBJECTS), district=self.rng.choice(DISTRICTS))
+        return text[0].upper() + text[1:]
+
+    def image(self, prefix: str) -> str:
+        return f"/uploads/{prefix}_{self.rng.getrandbits(48):012x}.jpg"
+
+    def phone(self) -> str:
+        return f"05{self.rng.randint(30, 59)} {self.rng.randint(100, 999)} {self.rng.randint(10, 99)} {self.rng.randint(10, 99)}"
+
+    def email(self, name: str, index: int) -> str:
+        local = create_slug(name).replace("-", ".")
+        return f"{local}.{index}@example.com"
+
+def announcements(f: DocumentFactory, count: int) -> Iterator[Dict]:
+    for i in range(count):
+        published_at = f.moment()
+        title = f"{f.title()} ({i + 1})"
+        content = f.paragraph(f.rng.randint(4, 20))
+        yield {
+            "_id": f.object_id(published_at),
+            "title": title,
+            "content": content,
+            "category": f.rng.choice(CATEGORIES),
+            "cover_image": f.image("duyuru") if f.rng.random() < 0.6 else None,
+            "slug": create_slug(title),
+            "excerpt": create_excerpt(content),
+            "published_at": published_at,
+            "created_at": published_at,
+        }
+
+def visits(f: DocumentFactory, count: int) -> Iterator[Dict]:
+    for i in range(count):
+        created_at = f.moment()
+        yield {
+            "_id": f.object_id(created_at),
+            "title": f"{f.person()} odamızı ziyaret etti",
+            "date": created_at.strftime("%Y-%m-%d"),
+            "description": f.paragraph(f.rng.randint(2, 6)),
+            "cover_image": f.image("ziyaret"),
+            "gallery_images": [f.image("ziyaret") for _ in range(f.rng.randint(0, 12))],
+            "created_at": created_at,
+        }
+
+def press(f: DocumentFactory, count: int) -> Iterator[Dict]:
+    for i in range(count):
+        created_at = f.moment()
+        source = f.rng.choice(PRESS_SOURCES)
+        yield {
+            "_id": f.object_id(created_at),
+            "title": f.title(),
+            "description": f.paragraph(f.rng.randint(2, 8)),
+            "date": created_at.strftime("%Y-%m-%d"),
+            "source": source,
+            "source_url": f"https://www.{create_slug(source)}.com.tr/haber/{f.rng.getrandbits(32)}",
+            "cover_image": f.image("basin") if f.rng.random() < 0.7 else None,
+            "created_at": created_at,
+        }
+
+def condolences(f: DocumentFactory, count: int) -> Iterator[Dict]:
+    for i in range(count):
+        created_at = f.moment()
+        member = f.person()
+        relation = f.rng.choice(RELATIONS)
+        deceased = f.person()
+        title = f"Üyemiz {member}'in {relation} {deceased} vefat etmiştir" if relation else f"Üyemiz {member} vefat etmiştir"
+        yield {
+            "_id": f.object_id(created_at),
+            "title": title,
+            "content": "Merhuma Allah'tan rahmet, ailesine ve yakınlarına başsağlığı dileriz.",
+            "date": created_at.strftime("%Y-%m-%d"),
+            "person_name": deceased if relation else member,
+            "relation": relation,
+            "created_at": created_at,
+        }
+
+def trainings(f: DocumentFactory, count: int) -> Iterator[Dict]:
+    for i in range(count):
+        created_at = f.moment()
+        subject = f.rng.choice(SUBJECTS)
+        yield {
+            "_id": f.object_id(created_at),
+            "title": f"{subject[0].upper() + subject[1:]} eğitimi",
+            "description": f.paragraph(f.rng.randint(2, 6)),
+            "date": (created_at + timedelta(days=f.rng.randint(7, 60))).strftime("%Y-%m-%d"),
+            "time": f"{f.rng.randint(9, 17):02d}:{f.rng.choice(['00', '30'])}",
+            "location": f"KEESO Konferans Salonu, {f.rng.choice(DISTRICTS)}",
+            "instructor": f.person(),
+            "capacity": f.rng.choice([20, 30, 50, 100]),
+            "registration_link": None,
+            "cover_image": f.image("egitim"),
+            "gallery_images": [f.image("egitim") for _ in range(f.rng.randint(0, 8))],
+            "created_at": created_at,
+        }
+
+def documents(f: DocumentFactory, count: int) -> Iterator[Dict]:
+    for i in range(count):
+        created_at = f.moment()
+        subject = f.rng.choice(SUBJECTS)
+        yield {
+            "_id": f.object_id(created_at),
+            "title": f"{subject[0].upper() + subject[1:]} formu {i + 1}",
+            "description": f.rng.choice(SENTENCES),
+            "file_url": f"/uploads/belge_{f.rng.getrandbits(48):012x}.pdf",
+            "tags": f.rng.sample(SUBJECTS, f.rng.randint(1, 3)),
+            "created_at": created_at,
+        }
+
+def contacts(f: DocumentFactory, count: int) -> Iterator[Dict]:
+    for i in range(count):
+        created_at = f.moment()
+        name = f.person()
+        yield {
+            "_id": f.object_id(created_at),
+            "name": name,
+            "email": f.email(name, i),
+            "phone": f.phone(),
+            "message": f.paragraph(f.rng.randint(1, 4)),
+            "status": "new",
+            "created_at": created_at,
+        }
+
+def membership_applications(f: DocumentFactory, count: int) -> Iterator[Dict]:
+    for i in range(count):
+        created_at = f.moment()
+        name = f.person()
+        yield {
+            "_id": f.object_id(created_at),
+            "name": name,
+            "email": f.email(name, i),
+            "phone": f.phone(),
+            "address": f"{f.rng.choice(STREETS)} No:{f.rng.randint(1, 250)}, {f.rng.choice(DISTRICTS)}/Kayseri",
+            "tax_number": f"{f.rng.randint(1, 9)}{f.rng.randint(0, 999_999_999):09d}",
+            "note": f.rng.choice(SENTENCES) if f.rng.random() < 0.3 else None,
+            "files": [f"/uploads/basvuru_{f.rng.getrandbits(48):012x}.pdf" for _ in range(f.rng.randint(0, 3))],
+            "status": f.rng.choice(["pending", "pending", "approved", "rejected"]),
+            "created_at": created_at,
+        }
+
+def board_members(f: DocumentFactory, count: int) -> Iterator[Dict]:
+    for i in range(count):
+        created_at = f.moment()
+        board_type = "yonetim" if i % 3 else "denetim"
+        yield {
+            "_id": f.object_id(created_at),
+            "name": f.person(),
+            "position": POSITIONS[min(i // 3, len(POSITIONS) - 1)],
+            "board_type": board_type,
+            "photo": f.image("uye"),
+            "bio": f.paragraph(2),
+            "order": i,
+            "created_at": created_at,
+        }
+
+def payments(f: DocumentFactory, count: int) -> Iterator[Dict]:
+    for i in range(count):
+        created_at = f.moment()
+        title = PAYMENT_TITLES[i % len(PAYMENT_TITLES)]
+        yield {
+            "_id": f.object_id(created_at),
+            "title": f"{title} {created_at.year}",
+            "description": f.rng.choice(SENTENCES),
+            "external_url": f"https://odeme.example.com/keeso/{create_slug(title)}",
+            "button_text": "Ödeme Yap",
+            "created_at": created_at,
+        }
+
+GENERATORS = {
+    "announcements": announcements,
+    "contacts": contacts,
+    "membership_applications": membership_applications,
+    "press": press,
+    "condolences": condolences,
+    "visits": visits,
+    "documents": documents,
+    "trainings": trainings,
+    "board_members": board_members,
+    "payments": payments,
+}
+
+async def load_collection(name: str, count: int, seed: int, batch_size: int, parallel: int) -> int:
+    """Insert `count` generated documents in batches, keeping `parallel` batches in flight"""
+    factory = DocumentFactory(seed, name)
+    pending = set()
+    inserted = 0
+    batch = []
+
+    async def flush(docs):
+        await server.db[name].insert_many(docs, ordered=False)
+        return len(docs)
+
+    for doc in GENERATORS[name](factory, count):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            pending.add(asyncio.ensure_future(flush(batch)))
+            batch = []
+            if len(pending) >= parallel:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                inserted += sum(task.result() for task in done)
+    if batch:
+        pending.add(asyncio.ensure_future(flush(batch)))
+    if pending:
+        done, _ = await asyncio.wait(pending)
+        inserted += sum(task.result() for task in done)
+    return inserted
+
+async def generate(counts: Dict[str, int], seed: int, batch_size: int, parallel: int, drop: bool):
+    # _ids are derived from the seed, so loading on top of an earlier run
+    # would collide on every document; refuse before writing anything
+    if not drop:
+        occupied = [
+            name for name, count in counts.items()
+            if count > 0 and await server.db[name].find_one({}, projection={"_id": 1}) is not None
+        ]
+        if occupied:
+            raise SystemExit(f"Collections already hold data: {', '.join(occupied)}; rerun with --drop to replace them")
+    for name, count in counts.items():
+        if count <= 0:
+            continue
+        if drop:
+            await server.db[name].delete_many({})
+        started = time.perf_counter()
+        inserted = await load_collection(name, count, seed, batch_size, parallel)
+        elapsed = time.perf_counter() - started
+        print(f"✅ {name}: {inserted} documents in {elapsed:.1f}s ({inserted / elapsed if elapsed else 0:.0f}/s)")
+
+    # Bring derived state in line with what was loaded
+    index_result = await server.ensure_indexes()
+    if index_result["created"] or index_result["rebuilt"]:
+        print(f"✅ Indexes reconciled: {index_result}")
+    totals = await server.rebuild_totals()
+    print(f"✅ Totals rebuilt for {len(totals)} counters")
+    if any(counts.get(name, 0) > 0 for name in server.SEARCH_SOURCES):
+        search = await server.rebuild_search_index()
+        print(f"✅ Search index rebuilt: {search['terms']} terms")
+    for name, count in counts.items():
+        if count > 0:
+            await server.mark_changed(name)
+
+def parse_counts(scale: float, overrides) -> Dict[str, int]:
+    counts = {name: int(count * scale) for name, count in BASE_COUNTS.items()}
+    for override in overrides or []:
+        name, _, value = override.partition("=")
+        if name not in GENERATORS or not value.isdigit():
+            raise SystemExit(f"Invalid --count {override!r}; expected <collection>=<n> with one of: {', '.join(GENERATORS)}")
+        counts[name] = int(value)
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic KEESO dataset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for the default collection sizes")
+    parser.add_argument("--count", action="append", metavar="COLLECTION=N", help="Exact size for one collection (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--parallel", type=int, default=4, help="insert_many batches kept in flight")
+    parser.add_argument("--drop", action="store_true", help="Empty the generated collections first")
+    args = parser.parse_args()
+    print(f"Generating into {os.getenv('MONGO_URL', 'mongodb://localhost:27017')} (seed {args.seed})")
+    asyncio.run(generate(parse_counts(args.scale, args.count), args.seed, args.batch_size, args.parallel, args.drop))
@@ -1,18 +1,49 @@
-from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form, BackgroundTasks, Query
+from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response, FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import Response, FileResponse, RedirectResponse, JSONResponse
+from fastapi.routing import APIRoute
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
-from bson import ObjectId
+from pymongo import ReturnDocument, InsertOne, UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo import monitoring
+from pydantic import BaseModel, EmailStr, Field, ValidationError
+from typing import List, Optional, Dict, Any, Union
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from bson import ObjectId, Binary, Decimal128, Regex
 import os
 import uuid
 import hashlib
 from pathlib import Path
 import mimetypes
 import re
+import json
+import base64
+import time
+import functools
+import bisect
+import threading
+import contextvars
+import inspect
+import asyncio
+import multiprocessing
+import anyio
+import tempfile
+import gzip
+import zlib
+import math
+import unicodedata
+from xml.sax.saxutils import escape as xml_escape
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict
+import orjson
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import smtplib
@@ -31,27 +62,289 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Metrics
+# In-process request and MongoDB metrics, rendered in Prometheus text format
+# at /metrics. Requests are timed per route template by BSONRoute.handle,
+# so the time spent sending a body (file downloads included) counts too.
+# Mongo commands are timed per collection by a PyMongo command listener
+# registered on the client. Each worker process keeps its own registry;
+# scrape every worker or aggregate in Prometheus. Quantiles are
+# interpolated from the histogram buckets, like histogram_quantile().
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_QUANTILES = (0.5, 0.95, 0.99)
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+def _labels(names: tuple, values: tuple) -> str:
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+class MetricsRegistry:
+    def __init__(self):
+        # Command listener callbacks run on Motor's worker threads
+        self._lock = threading.Lock()
+        self.requests: Dict[tuple, int] = {}
+        self.request_latency: Dict[tuple, Histogram] = {}
+        self.in_flight: Dict[tuple, int] = {}
+        self.mongo_commands: Dict[tuple, int] = {}
+        self.mongo_latency: Dict[tuple, Histogram] = {}
+        self.started_at = time.time()
+
+    def request_started(self, route: str, method: str):
+        with self._lock:
+            self.in_flight[(route, method)] = self.in_flight.get((route, method), 0) + 1
+
+    def request_finished(self, route: str, method: str, status: int, seconds: float):
+        with self._lock:
+            self.in_flight[(route, method)] -= 1
+            key = (route, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.request_latency.setdefault((route, method), Histogram()).observe(seconds)
+
+    def mongo_command(self, collection: str, command: str, outcome: str, seconds: float):
+        with self._lock:
+            key = (collection, command, outcome)
+            self.mongo_commands[key] = self.mongo_commands.get(key, 0) + 1
+            self.mongo_latency.setdefault((collection, command), Histogram()).observe(seconds)
+
+    def _histogram_lines(self, name: str, label_names: tuple, histograms: Dict[tuple, Histogram]) -> List[str]:
+        lines = [f"# TYPE {name} histogram"]
+        for labels, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(label_names + ('le',), labels + (bound,))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(label_names + ('le',), labels + ('+Inf',))} {histogram.count}")
+            lines.append(f"{name}_sum{_labels(label_names, labels)} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{_labels(label_names, labels)} {histogram.count}")
+        lines.append(f"# TYPE {name}_quantile gauge")
+        for labels, histogram in sorted(histograms.items()):
+            for q in METRIC_QUANTILES:
+                lines.append(f"{name}_quantile{_labels(label_names + ('quantile',), labels + (q,))} {histogram.quantile(q):.6f}")
+        return lines
+
+    def render(self) -> str:
+        with self._lock:
+            lines = ["# TYPE process_uptime_seconds gauge", f"process_uptime_seconds {time.time() - self.started_at:.3f}"]
+            lines.append("# TYPE http_requests_total counter")
+            for labels, value in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{_labels(('route', 'method', 'status'), labels)} {value}")
+            lines.append("# TYPE http_requests_in_flight gauge")
+            for labels, value in sorted(self.in_flight.items()):
+                lines.append(f"http_requests_in_flight{_labels(('route', 'method'), labels)} {value}")
+            lines += self._histogram_lines("http_request_duration_seconds", ("route", "method"), self.request_latency)
+            lines.append("# TYPE mongodb_commands_total counter")
+            for labels, value in sorted(self.mongo_commands.items()):
+                lines.append(f"mongodb_commands_total{_labels(('collection', 'command', 'outcome'), labels)} {value}")
+            lines += self._histogram_lines("mongodb_command_duration_seconds", ("collection", "command"), self.mongo_latency)
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+# Slow Query Log
+# Reads issued while a route is being handled (find, aggregate, count,
+# distinct) that take SLOW_QUERY_MS or longer are written to the capped
+# `slow_queries` collection, together with the explain("executionStats")
+# winning plan. The listener only notes the command; the explain and the
+# insert run later on the event loop so the request is not slowed further.
+# Each query shape is captured at most once per SLOW_QUERY_COOLDOWN seconds,
+# since explain runs the query again. Filters, sorts, pipelines and plans are
+# stored as JSON text: their `$`-prefixed keys are rejected as field names
+# by MongoDB servers before 5.0.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_COOLDOWN = float(os.getenv("SLOW_QUERY_COOLDOWN", "60"))
+SLOW_QUERY_LOG_BYTES = int(os.getenv("SLOW_QUERY_LOG_BYTES", str(16 * 1024 * 1024)))
+SLOW_QUERY_COMMANDS = {"find", "aggregate", "count", "distinct"}
+
+# Route template of the request being handled; Motor copies the context
+# into the thread that runs the command, so the listener can read it
+current_route: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_route", default=None)
+
+def _winning_plan(explain: Dict) -> tuple:
+    """(queryPlanner, executionStats) from find or aggregate explain output"""
+    if "queryPlanner" not in explain and explain.get("stages"):
+        explain = explain["stages"][0].get("$cursor", {})
+    return explain.get("queryPlanner", {}), explain.get("executionStats", {})
+
+def _plan_stages(plan: Dict) -> List[str]:
+    stages = [plan.get("stage")] if plan.get("stage") else []
+    for child in [plan.get("inputStage"), *plan.get("inputStages", [])]:
+        if child:
+            stages += _plan_stages(child)
+    return stages
+
+def _query_text(value: Any) -> Optional[str]:
+    return orjson.dumps(value, default=bson_default).decode() if value is not None else None
+
+class SlowQueryLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_capture: Dict[tuple, float] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.captured = 0
+        self.suppressed = 0
+
+    def observe(self, route: Optional[str], database: str, collection: str, command_name: str, command: Dict, seconds: float):
+        """Called from the command listener, possibly on a Motor worker thread"""
+        if route is None or self.loop is None or command_name not in SLOW_QUERY_COMMANDS:
+            return
+        if seconds * 1000 < SLOW_QUERY_MS or collection == "slow_queries":
+            return
+        query = command.get("filter") or command.get("query") or {}
+        shape = (route, collection, command_name, tuple(sorted(query)) if isinstance(query, dict) else ())
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_capture.get(shape, float("-inf")) < SLOW_QUERY_COOLDOWN:
+                self.suppressed += 1
+                return
+            self._last_capture[shape] = now
+            self.captured += 1
+        entry = {
+            "route": route,
+            "collection": collection,
+            "command": command_name,
+            "duration_ms": round(seconds * 1000, 3),
+            "filter": _query_text(query),
+            "sort": _query_text(command.get("sort")),
+            "skip": command.get("skip"),
+            "limit": command.get("limit"),
+            "pipeline": _query_text(command.get("pipeline")),
+        }
+        explain_command = {key: value for key, value in command.items() if not key.startswith("$") and key not in ("lsid", "txnNumber")}
+        self.loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self._record(database, explain_command, entry)))
+
+    async def _record(self, database: str, command: Dict, entry: Dict):
+        try:
+            explain = await client[database].command({"explain": command, "verbosity": "executionStats"})
+            planner, stats = _winning_plan(explain)
+            plan = planner.get("winningPlan", {})
+            entry["plan"] = _query_text(plan)
+            entry["plan_stages"] = _plan_stages(plan)
+            entry["collscan"] = "COLLSCAN" in entry["plan_stages"]
+            entry["stats"] = {
+                key: stats.get(key)
+                for key in ("nReturned", "executionTimeMillis", "totalKeysExamined", "totalDocsExamined")
+            }
+        except Exception as e:
+            entry["explain_error"] = str(e)
+        entry["created_at"] = datetime.utcnow()
+        try:
+            await db.slow_queries.insert_one(entry)
+        except Exception as e:
+            print(f"Slow query log error: {str(e)}")
+
+slow_query_log = SlowQueryLog()
+
+async def ensure_slow_query_log():
+    """Create `slow_queries` as a capped collection (or convert it)"""
+    if "slow_queries" not in await db.list_collection_names(filter={"name": "slow_queries"}):
+        await db.create_collection("slow_queries", capped=True, size=SLOW_QUERY_LOG_BYTES)
+    elif not (await db.slow_queries.options()).get("capped"):
+        await db.command("convertToCapped", "slow_queries", size=SLOW_QUERY_LOG_BYTES)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every command the client sends, labelled by collection.
+
+    Reads slower than SLOW_QUERY_MS are also handed to the slow query log.
+    """
+    def __init__(self):
+        self._pending: Dict[tuple, tuple] = {}
+
+    def started(self, event):
+        # Most commands name their collection in the first field; getMore
+        # carries it in "collection"
+        target = event.command.get("collection") if event.command_name == "getMore" else event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else "-"
+        self._pending[(event.connection_id, event.request_id)] = (
+            collection, event.command_name, event.database_name, current_route.get(),
+            event.command if event.command_name in SLOW_QUERY_COMMANDS else None
+        )
+
+    def _finish(self, event, outcome: str):
+        collection, command_name, database, route, command = self._pending.pop(
+            (event.connection_id, event.request_id), ("-", event.command_name, None, None, None)
+        )
+        seconds = event.duration_micros / 1e6
+        metrics.mongo_command(collection, command_name, outcome, seconds)
+        if command is not None and outcome == "success":
+            slow_query_log.observe(route, database, collection, command_name, command, seconds)
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
+
 # MongoDB Connection
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-client = AsyncIOMotorClient(MONGO_URL)
+client = AsyncIOMotorClient(MONGO_URL, event_listeners=[MongoCommandMetrics()])
 db = client.keeso_db
 
 # JWT Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "keeso-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
+# Resolved users are cached per (sub, iat) for this long. A revocation or
+# user change is seen immediately by this worker and within the TTL by others.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "1024"))
 
 # Password Hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Changing BCRYPT_ROUNDS makes existing hashes "need update"; they are
+# rehashed transparently the next time their owner logs in.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # File Upload Configuration
 UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "/app/uploads"))
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+# Store uploads under their SHA-256 so identical bytes are kept once
+CONTENT_ADDRESSED_UPLOADS = os.getenv("CONTENT_ADDRESSED_UPLOADS", "true").lower() == "true"
 ALLOWED_EXTENSIONS = {"pdf", "jpg", "jpeg", "png", "doc", "docx"}
 
-# Mount uploads directory
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+# Image Derivative Configuration
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png"}
+IMAGE_VARIANT_WIDTHS = [int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1280").split(",")]
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+# Storage Configuration
+STORAGE_DRIVER = os.getenv("STORAGE_DRIVER", "local")  # local or s3
+S3_ENDPOINT = os.getenv("S3_ENDPOINT")  # e.g. http://localhost:9000 for MinIO
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+S3_BUCKET = os.getenv("S3_BUCKET")
+S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY")
+S3_SECRET_KEY = os.getenv("S3_SECRET_KEY")
+S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL")  # CDN or bucket URL objects are served from
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", str(8 * 1024 * 1024)))
+PRESIGNED_URL_EXPIRES = int(os.getenv("PRESIGNED_URL_EXPIRES", "900"))  # 15 minutes
 
 # Email Configuration
 EMAIL_PROVIDER = os.getenv("EMAIL_PROVIDER", "smtp")  # smtp or sendgrid
@@ -64,28 +357,164 @@ SMTP_HOST = os.getenv("SMTP_HOST")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
 SMTP_USER = os.getenv("SMTP_USER")
 SMTP_PASS = os.getenv("SMTP_PASS")
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))  # seconds before an idle connection is dropped
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
 
 # Helper Functions
 def serialize_doc(doc: Dict) -> Dict:
-    """Convert MongoDB document to JSON-serializable dict"""
-    if not doc:
-        return doc
-    if "_id" in doc:
-        doc["id"] = str(doc["_id"])
-        del doc["_id"]
-    # Handle datetime objects
-    for key, value in doc.items():
-        if isinstance(value, datetime):
-            doc[key] = value.isoformat()
-        elif isinstance(value, ObjectId):
-            doc[key] = str(value)
+    """Expose a MongoDB document's `_id` as `id`.
+
+    BSON values (ObjectId, datetime, ...) are left in place, at any depth;
+    BSONResponse encodes them in the same pass that renders the JSON.
+    """
+    if doc and "_id" in doc:
+        doc["id"] = str(doc.pop("_id"))
     return doc
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+def bson_default(value: Any) -> Any:
+    """orjson fallback for the types orjson does not encode natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    if isinstance(value, BaseModel):
+        return value.dict()
+    if isinstance(value, (Regex, re.Pattern)):
+        return value.pattern
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+class BSONResponse(JSONResponse):
+    """JSON response rendered by orjson, BSON-aware through bson_default.
+
+    Naive datetimes render like datetime.isoformat(), as serialize_doc used
+    to produce them.
+    """
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=bson_default, option=orjson.OPT_NON_STR_KEYS)
+
+class BSONRoute(APIRoute):
+    """Route that hands plain handler results straight to BSONResponse.
+
+    FastAPI would otherwise run every result through jsonable_encoder,
+    which walks and copies the whole payload before it is dumped again.
+    Headers and status set on the injected Response (see http_cache) are
+    carried over to the rendered response. Each request is also recorded
+    in the metrics registry under the route template.
+    """
+    def __init__(self, path: str, endpoint, **kwargs):
+        if asyncio.iscoroutinefunction(endpoint):
+            endpoint = self._render_with_bson(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    async def handle(self, scope, receive, send):
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.request_started(self.path, method)
+        route_token = current_route.set(self.path)
+        started = time.perf_counter()
+        try:
+            await super().handle(scope, receive, send_with_status)
+        except HTTPException as e:
+            status = e.status_code
+            raise
+        finally:
+            metrics.request_finished(self.path, method, status, time.perf_counter() - started)
+            current_route.reset(route_token)
+
+    def _render_with_bson(self, endpoint):
+        signature = inspect.signature(endpoint)
+        sub_response_param = inspect.Parameter("_sub_response", inspect.Parameter.KEYWORD_ONLY, annotation=Response)
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, _sub_response: Response, **kwargs):
+            result = await endpoint(*args, **kwargs)
+            if isinstance(result, Response):
+                return result
+            response = BSONResponse(result, status_code=_sub_response.status_code or self.status_code or 200)
+            response.headers.update(_sub_response.headers)
+            return response
+
+        wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), sub_response_param])
+        return wrapper
+
+app.router.route_class = BSONRoute
+
+class PasswordHasher:
+    """Runs bcrypt on a small thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL, so threads give real parallelism here. At most
+    `workers` hashes run at once; callers beyond that wait in a bounded
+    queue and are turned away with 503 once it is full.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = asyncio.Semaphore(workers)
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queued = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    async def run(self, func, *args):
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Sunucu meşgul, lütfen tekrar deneyin", headers={"Retry-After": "1"})
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        enqueued_at = time.monotonic()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        started_at = time.monotonic()
+        self.total_wait_seconds += started_at - enqueued_at
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.total_run_seconds += time.monotonic() - started_at
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "bcrypt_rounds": BCRYPT_ROUNDS,
+            "queued": self.queued,
+            "running": self.running,
+            "max_queued": self.max_queued,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+            "avg_run_ms": round(self.total_run_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+        }
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple:
+    """Returns (valid, new_hash); new_hash is set when the stored cost is outdated"""
+    return await password_hasher.run(pwd_context.verify_and_update, plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    return await password_hasher.run(pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -93,45 +522,637 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(lambda: None)):
-    """Dependency to get current user from JWT token"""
-    if not token:
+bearer_scheme = HTTPBearer(auto_error=False)
+
+async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)):
+    """Dependency to get current user from JWT token.
+
+    Users are resolved from user_cache when possible, so most authenticated
+    requests never reach the users collection. The token's `ver` claim must
+    match the user's token_version; bumping it revokes every earlier token.
+    """
+    if not credentials:
         raise HTTPException(status_code=401, detail="Not authenticated")
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"email": email})
-        if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
-        return serialize_doc(user)
+        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    email: str = payload.get("sub")
+    if email is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    key = ("users", email, payload.get("iat"))
+    user = user_cache.get(key)
+    if user is None:
+        generation = user_cache.generation("users")
+        user = await db.users.find_one({"email": email}, projection={"password_hash": 0})
+        if user is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        user = serialize_doc(user)
+        user_cache.set(key, user, generation)
+    if user.get("token_version", 0) != payload.get("ver", 0):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    return dict(user)
+
+async def revoke_user_tokens(email: str) -> bool:
+    result = await db.users.update_one({"email": email}, {"$inc": {"token_version": 1}})
+    user_cache.invalidate("users", email)
+    return result.matched_count > 0
+
+# Turkish character replacements
+TURKISH_CHAR_MAP = {
+    'ç': 'c', 'ğ': 'g', 'ı': 'i', 'ö': 'o', 'ş': 's', 'ü': 'u',
+    'Ç': 'c', 'Ğ': 'g', 'İ': 'i', 'Ö': 'o', 'Ş': 's', 'Ü': 'u'
+}
 
 def create_slug(text: str) -> str:
     """Create URL-friendly slug from Turkish text"""
-    # Turkish character replacements
-    tr_map = {
-        'ç': 'c', 'ğ': 'g', 'ı': 'i', 'ö': 'o', 'ş': 's', 'ü': 'u',
-        'Ç': 'c', 'Ğ': 'g', 'İ': 'i', 'Ö': 'o', 'Ş': 's', 'Ü': 'u'
-    }
-    for tr_char, en_char in tr_map.items():
+    for tr_char, en_char in TURKISH_CHAR_MAP.items():
         text = text.replace(tr_char, en_char)
     text = text.lower()
     text = re.sub(r'[^a-z0-9]+', '-', text)
     text = text.strip('-')
     return text
 
+def fold_turkish(text: str) -> str:
+    """Lowercase ASCII form of Turkish text for matching.
+
+    Applies the slug replacements before lowercasing, so İ/I/ı all fold to
+    "i" instead of Python's "i̇" and "i", then strips remaining diacritics
+    such as the circumflex in "kâr" or "hâlâ".
+    """
+    for tr_char, en_char in TURKISH_CHAR_MAP.items():
+        text = text.replace(tr_char, en_char)
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+EXCERPT_LENGTH = 200
+
+def create_excerpt(text: str) -> str:
+    """Short plain-text preview stored with announcements for list views"""
+    text = " ".join(text.split())
+    return text if len(text) <= EXCERPT_LENGTH else text[:EXCERPT_LENGTH].rstrip() + "…"
+
+EXCERPT_BACKFILL_KEY = "announcement_excerpts"  # `migrations` marker
+EXCERPT_BACKFILL_BATCH_SIZE = 1000
+
+async def backfill_excerpts() -> int:
+    """Give announcements written before excerpts existed one, in bulk batches"""
+    updated = 0
+    batch, ids = [], []
+
+    async def flush():
+        nonlocal updated
+        await db.announcements.bulk_write(batch, ordered=False)
+        await mark_changed("announcements", ids[:])
+        updated += len(batch)
+        batch.clear()
+        ids.clear()
+
+    async for announcement in db.announcements.find({"excerpt": {"$exists": False}}, projection={"content": 1}):
+        ids.append(str(announcement["_id"]))
+        batch.append(UpdateOne(
+            {"_id": announcement["_id"]},
+            {"$set": {"excerpt": create_excerpt(announcement.get("content") or "")}}
+        ))
+        if len(batch) >= EXCERPT_BACKFILL_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    await db.migrations.update_one({"_id": EXCERPT_BACKFILL_KEY}, {"$set": {"done_at": datetime.utcnow(), "updated": updated}}, upsert=True)
+    return updated
+
+async def schedule_excerpt_backfill():
+    """Queue the excerpt backfill unless it has run; workers race on startup"""
+    if await db.migrations.find_one({"_id": EXCERPT_BACKFILL_KEY}, projection={"_id": 1}) is not None:
+        return
+    if await db.jobs.find_one({"kind": "excerpt_backfill", "status": {"$in": ["queued", "running"]}}, projection={"_id": 1}):
+        return
+    await enqueue_job("excerpt_backfill", {})
+
+# Default list projections. List views only need what a card shows; the
+# detail routes still return whole documents. `fields=` overrides these with
+# a comma-separated field list, or `fields=all` for the full documents.
+LIST_PROJECTIONS = {
+    "announcements": ["title", "slug", "category", "cover_image", "excerpt", "published_at", "created_at", "updated_at"],
+    "visits": ["title", "date", "description", "cover_image", "created_at", "updated_at"],
+}
+_FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+def list_projection(collection_name: str, fields: Optional[str] = None) -> Optional[Dict[str, int]]:
+    """Turn a `fields=` parameter into a Mongo projection (None means everything)"""
+    if fields is None:
+        names = LIST_PROJECTIONS.get(collection_name)
+    elif fields.strip() == "all":
+        names = None
+    else:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        if not names or not all(_FIELD_NAME.match(name) for name in names):
+            raise HTTPException(status_code=400, detail="Geçersiz alan listesi")
+    if names is None:
+        return None
+    return {name: 1 for name in names if name not in ("id", "_id")}
+
+def encode_cursor(doc: Dict, sort_field: str) -> str:
+    """Build an opaque keyset cursor from the last document of a page"""
+    value = doc.get(sort_field)
+    payload = {"id": str(doc["_id"])}
+    if isinstance(value, datetime):
+        payload["v"] = value.isoformat()
+        payload["t"] = "dt"
+    else:
+        payload["v"] = value
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of encode_cursor; returns (sort_value, ObjectId)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        value = payload["v"]
+        if payload.get("t") == "dt":
+            value = datetime.fromisoformat(value)
+        return value, ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Geçersiz sayfa imleci")
+
+async def paginate(collection, query: Dict, sort_field: str, limit: int, skip: int = 0, cursor: Optional[str] = None, projection: Optional[Dict[str, int]] = None) -> tuple:
+    """Fetch one page sorted by (sort_field, _id) descending.
+
+    With a cursor, seeks past the previous page instead of skipping, so the
+    cost does not grow with page depth. `skip` is kept for older clients and
+    ignored when a cursor is given. A projection always keeps the sort field
+    so the next cursor can be built. Returns (docs, next_cursor).
+    """
+    if projection is not None:
+        projection = {**projection, sort_field: 1}
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        seek = {"$or": [
+            {sort_field: {"$lt": value}},
+            {sort_field: value, "_id": {"$lt": last_id}},
+        ]}
+        query = {"$and": [query, seek]} if query else seek
+        skip = 0
+    docs = await collection.find(query, projection=projection).sort([(sort_field, -1), ("_id", -1)]).skip(skip).limit(limit + 1).to_list(length=limit + 1)
+    next_cursor = encode_cursor(docs[limit - 1], sort_field) if len(docs) > limit and limit > 0 else None
+    return docs[:limit], next_cursor
+
+# Storage Backends
+# Uploads are streamed to a temp file first (see save_upload) and then handed
+# to the configured driver under their final key.
+class LocalStorage:
+    name = "local"
+
+    def url(self, key: str) -> str:
+        return f"/uploads/{key}"
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        return url[len("/uploads/"):] if url.startswith("/uploads/") else None
+
+    async def save(self, tmp_path: Path, key: str, content_type: Optional[str] = None):
+        await run_in_threadpool(os.replace, tmp_path, UPLOAD_DIR / key)
+
+    async def delete(self, key: str):
+        path = UPLOAD_DIR / key
+        if path.exists():
+            await run_in_threadpool(path.unlink)
+
+    async def exists(self, key: str) -> bool:
+        return (UPLOAD_DIR / key).exists()
+
+    async def fetch(self, key: str, dest: Path) -> Path:
+        # Already on local disk; read it in place
+        return UPLOAD_DIR / key
+
+    def presign_upload(self, key: str, content_type: Optional[str], size: int) -> Optional[str]:
+        return None
+
+class S3Storage:
+    name = "s3"
+
+    def __init__(self):
+        import boto3
+        from botocore.config import Config
+        from boto3.s3.transfer import TransferConfig
+
+        # Path-style addressing keeps MinIO and other S3-compatible servers happy
+        config = Config(
+            signature_version="s3v4",
+            s3={"addressing_style": "path" if S3_ENDPOINT else "auto"}
+        )
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=S3_ENDPOINT,
+            aws_access_key_id=S3_ACCESS_KEY,
+            aws_secret_access_key=S3_SECRET_KEY,
+            region_name=S3_REGION,
+            config=config
+        )
+        self.bucket = S3_BUCKET
+        self.transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=S3_MULTIPART_THRESHOLD
+        )
+        base = S3_PUBLIC_URL or (f"{S3_ENDPOINT}/{S3_BUCKET}" if S3_ENDPOINT else f"https://{S3_BUCKET}.s3.{S3_REGION}.amazonaws.com")
+        self.base_url = base.rstrip("/")
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        prefix = f"{self.base_url}/"
+        return url[len(prefix):] if url.startswith(prefix) else None
+
+    async def save(self, tmp_path: Path, key: str, content_type: Optional[str] = None):
+        # upload_file switches to a multipart upload above the threshold
+        await run_in_threadpool(
+            self.client.upload_file,
+            str(tmp_path),
+            self.bucket,
+            key,
+            ExtraArgs={"ContentType": content_type or "application/octet-stream"},
+            Config=self.transfer_config
+        )
+
+    async def delete(self, key: str):
+        await run_in_threadpool(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+    async def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            await run_in_threadpool(self.client.head_object, Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    async def fetch(self, key: str, dest: Path) -> Path:
+        await run_in_threadpool(self.client.download_file, self.bucket, key, str(dest))
+        return dest
+
+    def presign_upload(self, key: str, content_type: Optional[str], size: int) -> Optional[str]:
+        # Content type and length are part of the signature, so the browser
+        # cannot PUT a different kind or size of file with this URL
+        return self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type or "application/octet-stream",
+                "ContentLength": size
+            },
+            ExpiresIn=PRESIGNED_URL_EXPIRES
+        )
+
+def create_storage():
+    if STORAGE_DRIVER == "s3":
+        return S3Storage()
+    return LocalStorage()
+
+storage = create_storage()
+
+def _write_chunk(out, digest, chunk: bytes):
+    digest.update(chunk)
+    out.write(chunk)
+
+async def save_upload(file: UploadFile, file_ext: str) -> Optional[Dict[str, Any]]:
+    """Stream an upload to storage in fixed-size chunks.
+
+    Bytes go to a temp file in UPLOAD_DIR and are hashed on the way through;
+    the file is handed to the storage driver only once complete, so a
+    partial upload is never visible. Returns None as soon as the size limit
+    is crossed.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    random_id = uuid.uuid4().hex[:8]
+    safe_filename = f"{timestamp}_{random_id}.{file_ext}"
+    tmp_path = UPLOAD_DIR / f".{safe_filename}.part"
+    digest = hashlib.sha256()
+    size = 0
+    out = await run_in_threadpool(open, tmp_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                return None
+            await run_in_threadpool(_write_chunk, out, digest, chunk)
+        await run_in_threadpool(out.close)
+        sha256 = digest.hexdigest()
+        deduplicated = False
+        if CONTENT_ADDRESSED_UPLOADS:
+            # References are taken by the documents that use the URL (see
+            # retain_uploads); uploading only restarts the GC grace period
+            now = datetime.utcnow()
+            stored = await db.files.find_one_and_update(
+                {"_id": sha256},
+                {
+                    "$set": {"uploaded_at": now},
+                    "$setOnInsert": {
+                        "filename": f"{sha256}.{file_ext}",
+                        "size": size,
+                        "ref_count": 0,
+                        "refs_counted": True,
+                        "created_at": now
+                    }
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            safe_filename = stored["filename"]
+            deduplicated = stored["created_at"] != stored["uploaded_at"]
+        # A duplicate is not sent to storage again; only a record whose file
+        # went missing is healed, which costs a HEAD rather than an upload
+        if not deduplicated or not await storage.exists(safe_filename):
+            await storage.save(tmp_path, safe_filename, mimetypes.guess_type(safe_filename)[0])
+    finally:
+        if not out.closed:
+            await run_in_threadpool(out.close)
+        if tmp_path.exists():
+            await run_in_threadpool(tmp_path.unlink)
+    return {
+        "filename": safe_filename,
+        "file_url": storage.url(safe_filename),
+        "size": size,
+        "sha256": sha256,
+        "deduplicated": deduplicated
+    }
+
+# Upload fields on each collection. Every document holds one reference on
+# each content-addressed upload it points to: taken when the URL is written,
+# dropped when the URL is replaced or the document is deleted. The GC only
+# removes files that nothing references and that were not uploaded within
+# UPLOAD_GC_GRACE_SECONDS, so a file uploaded for a form that has not been
+# saved yet survives until the form is.
+UPLOAD_FIELDS = {
+    "announcements": ["cover_image"],
+    "documents": ["file_url"],
+    "visits": ["cover_image", "gallery_images"],
+    "board_members": ["photo"],
+    "trainings": ["cover_image", "gallery_images"],
+    "press": ["cover_image"],
+    "membership_applications": ["files"],
+}
+UPLOAD_GC_GRACE_SECONDS = int(os.getenv("UPLOAD_GC_GRACE_SECONDS", str(24 * 3600)))
+
+def upload_hashes(collection: str, doc: Optional[Dict]) -> set:
+    """Content hashes of the stored uploads a document points to"""
+    hashes = set()
+    for field in UPLOAD_FIELDS.get(collection, []):
+        value = doc.get(field) if doc else None
+        for url in value if isinstance(value, list) else [value]:
+            key = storage.key_from_url(url) if isinstance(url, str) else None
+            if key:
+                hashes.add(key.split(".")[0])
+    return hashes
+
+async def _adjust_upload_refs(hashes: set, delta: int):
+    if not hashes:
+        return
+    query = {"_id": {"$in": sorted(hashes)}}
+    if delta < 0:
+        query["ref_count"] = {"$gt": 0}
+    await db.files.update_many(query, {"$inc": {"ref_count": delta}})
+
+async def retain_uploads(collection: str, doc: Dict):
+    """Take a reference on each upload a new document uses"""
+    await _adjust_upload_refs(upload_hashes(collection, doc), 1)
+
+async def release_uploads(collection: str, doc: Dict):
+    """Drop the references of a deleted document.
+
+    Bytes are not removed here; unreferenced files are swept by
+    collect_unreferenced_uploads so a URL pasted into several records
+    cannot disappear from under the others.
+    """
+    await _adjust_upload_refs(upload_hashes(collection, doc), -1)
+
+async def replace_uploads(collection: str, previous: Dict, current: Dict):
+    """Move references from an updated document's old URLs to its new ones"""
+    old, new = upload_hashes(collection, previous), upload_hashes(collection, current)
+    await _adjust_upload_refs(new - old, 1)
+    await _adjust_upload_refs(old - new, -1)
+
+def _upload_projection(collection: str) -> Dict[str, int]:
+    return {field: 1 for field in UPLOAD_FIELDS.get(collection, [])}
+
+async def rebuild_upload_refs() -> Dict[str, int]:
+    """Recount every upload's references from the documents that use it"""
+    counts: Dict[str, int] = {}
+    for collection in UPLOAD_FIELDS:
+        async for doc in db[collection].find({}, projection=_upload_projection(collection)):
+            for sha256 in upload_hashes(collection, doc):
+                counts[sha256] = counts.get(sha256, 0) + 1
+    ids = [record["_id"] async for record in db.files.find({}, projection={"_id": 1})]
+    updates = [
+        UpdateOne({"_id": sha256}, {"$set": {"ref_count": counts.get(sha256, 0), "refs_counted": True}})
+        for sha256 in ids
+    ]
+    for start in range(0, len(updates), 1000):
+        await db.files.bulk_write(updates[start:start + 1000], ordered=False)
+    return {"files": len(ids), "referenced": sum(1 for sha256 in ids if counts.get(sha256))}
+
+async def schedule_upload_refs_rebuild():
+    """Recount once for file records written when uploads counted themselves"""
+    if await db.files.find_one({"refs_counted": {"$exists": False}}, projection={"_id": 1}) is None:
+        return
+    if await db.jobs.find_one({"kind": "upload_refs_rebuild", "status": {"$in": ["queued", "running"]}}, projection={"_id": 1}):
+        return
+    await enqueue_job("upload_refs_rebuild", {})
+    print("✅ Upload reference recount queued")
+
+async def collect_unreferenced_uploads() -> List[str]:
+    removed = []
+    cutoff = datetime.utcnow() - timedelta(seconds=UPLOAD_GC_GRACE_SECONDS)
+    unreferenced = {"ref_count": {"$lte": 0}, "refs_counted": True}
+    query = {**unreferenced, "$or": [
+        {"uploaded_at": {"$lt": cutoff}},
+        {"uploaded_at": {"$exists": False}, "created_at": {"$lt": cutoff}},
+    ]}
+    async for record in db.files.find(query):
+        # A re-upload since the scan restarts the grace period
+        result = await db.files.delete_one({"_id": record["_id"], **unreferenced, "uploaded_at": record.get("uploaded_at")})
+        if result.deleted_count == 0:
+            continue
+        await storage.delete(record["filename"])
+        for suffix in PRECOMPRESSED_SUFFIXES.values():
+            await storage.delete(record["filename"] + suffix)
+        for variant in record.get("variants", []):
+            await storage.delete(variant["filename"])
+        removed.append(record["filename"])
+    return removed
+
+# Image Derivatives
+# Resized WebP/JPEG copies of uploaded images, rendered in a process pool so
+# Pillow's CPU work neither blocks the event loop nor holds the GIL of the
+# web worker. Variants are recorded on the upload's `files` record.
+_image_pool: Optional[ProcessPoolExecutor] = None
+
+def get_image_pool() -> ProcessPoolExecutor:
+    global _image_pool
+    if _image_pool is None:
+        # forkserver children start from a clean single-threaded server
+        # process; forking this one (Motor and hashing threads) can deadlock
+        _image_pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("forkserver"))
+    return _image_pool
+
+def render_image_variants(src_path: str, out_dir: str, stem: str, widths: List[int]) -> List[Dict[str, Any]]:
+    """Runs in a worker process. Saved variants carry no EXIF metadata."""
+    from PIL import Image, ImageOps
+
+    with Image.open(src_path) as original:
+        # Apply the EXIF orientation before the metadata is dropped
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    # Never upscale; an image narrower than every target gets one variant
+    targets = sorted({w for w in widths if w < image.width}) or [image.width]
+    variants = []
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        for fmt, ext, options in (
+            ("webp", "webp", {"quality": 80, "method": 4}),
+            ("jpeg", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+        ):
+            filename = f"{stem}_{width}w.{ext}"
+            resized.save(os.path.join(out_dir, filename), fmt.upper(), **options)
+            variants.append({"width": width, "height": height, "format": fmt, "filename": filename})
+    return variants
+
+async def generate_image_variants(filename: str, sha256: str):
+    """Build and store variants for one uploaded image (runs as a queued job)"""
+    record = await db.files.find_one({"filename": filename}, projection={"variants": 1})
+    if record and record.get("variants"):
+        return
+    stem = filename.rsplit(".", 1)[0]
+    with tempfile.TemporaryDirectory(dir=UPLOAD_DIR, prefix=".variants_") as work_dir:
+        src_path = await storage.fetch(filename, Path(work_dir) / filename)
+        loop = asyncio.get_running_loop()
+        variants = await loop.run_in_executor(
+            get_image_pool(), render_image_variants,
+            str(src_path), work_dir, stem, IMAGE_VARIANT_WIDTHS
+        )
+        for variant in variants:
+            await storage.save(Path(work_dir) / variant["filename"], variant["filename"], mimetypes.guess_type(variant["filename"])[0])
+            variant["url"] = storage.url(variant["filename"])
+    await db.files.update_one(
+        {"filename": filename},
+        {"$set": {"variants": variants, "sha256": sha256}},
+        upsert=True
+    )
+
+def build_srcset(variants: List[Dict[str, Any]], fmt: str) -> str:
+    return ", ".join(f"{v['url']} {v['width']}w" for v in variants if v["format"] == fmt)
+
+def pick_variant(variants: List[Dict[str, Any]], width: int, fmt: str) -> Optional[Dict[str, Any]]:
+    """Smallest variant at least `width` wide, else the widest available"""
+    candidates = sorted((v for v in variants if v["format"] == fmt), key=lambda v: v["width"])
+    for variant in candidates:
+        if variant["width"] >= width:
+            return variant
+    return candidates[-1] if candidates else None
+
+class SMTPConnectionPool:
+    """Keeps a few authenticated SMTP connections open between sends.
+
+    smtplib is blocking, so connecting and sending run in the threadpool;
+    the pool only decides which connection a send uses. A connection that
+    was idle too long is replaced, and one that fails mid-send is dropped
+    and the send retried once on a fresh connection.
+    """
+
+    def __init__(self, size: int, idle_timeout: float):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._idle: List[tuple] = []  # (connection, last_used)
+        self._slots = asyncio.Semaphore(size)
+        self.connects = 0
+        self.reuses = 0
+        self.failures = 0
+
+    def _connect(self):
+        if SMTP_PORT == 587:
+            server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+            server.starttls()
+        elif SMTP_PORT == 465:
+            server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        else:
+            server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        server.login(SMTP_USER, SMTP_PASS)
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    async def _checkout(self, fresh: bool = False):
+        if fresh:
+            # After a failure the other idle connections are suspect too
+            await self.close()
+        while self._idle:
+            server, last_used = self._idle.pop()
+            if time.monotonic() - last_used < self.idle_timeout:
+                self.reuses += 1
+                return server
+            await run_in_threadpool(self._close, server)
+        self.connects += 1
+        return await run_in_threadpool(self._connect)
+
+    async def send(self, to_email: str, message: str):
+        async with self._slots:
+            for attempt in range(2):
+                server = await self._checkout(fresh=attempt > 0)
+                try:
+                    await run_in_threadpool(server.sendmail, EMAIL_FROM, to_email, message)
+                except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException, OSError):
+                    self.failures += 1
+                    await run_in_threadpool(self._close, server)
+                    if attempt:
+                        raise
+                    continue
+                self._idle.append((server, time.monotonic()))
+                return
+
+    async def close(self):
+        while self._idle:
+            server, _ = self._idle.pop()
+            await run_in_threadpool(self._close, server)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "connects": self.connects,
+            "reuses": self.reuses,
+            "failures": self.failures,
+        }
+
+smtp_pool = SMTPConnectionPool(SMTP_POOL_SIZE, SMTP_IDLE_TIMEOUT)
+_sendgrid_client = None
+
+def get_sendgrid_client():
+    """One SendGrid client for the whole process"""
+    global _sendgrid_client
+    if _sendgrid_client is None:
+        from sendgrid import SendGridAPIClient
+        _sendgrid_client = SendGridAPIClient(SENDGRID_API_KEY)
+    return _sendgrid_client
+
 async def send_email(to_email: str, subject: str, html_content: str):
-    """Send email via SendGrid or SMTP"""
+    """Send email via SendGrid or SMTP without blocking the event loop"""
     try:
         if EMAIL_PROVIDER == "sendgrid" and SENDGRID_API_KEY:
-            from sendgrid import SendGridAPIClient
             from sendgrid.helpers.mail import Mail
             
             message = Mail(
@@ -140,8 +1161,7 @@ async def send_email(to_email: str, subject: str, html_content: str):
                 subject=subject,
                 html_content=html_content
             )
-            sg = SendGridAPIClient(SENDGRID_API_KEY)
-            response = sg.send(message)
+            response = await run_in_threadpool(get_sendgrid_client().send, message)
             return response.status_code == 202
         else:
             # Use SMTP as fallback
@@ -157,17 +1177,7 @@ async def send_email(to_email: str, subject: str, html_content: str):
             part = MIMEText(html_content, 'html')
             msg.attach(part)
             
-            if SMTP_PORT == 587:
-                server = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
-                server.starttls()
-            elif SMTP_PORT == 465:
-                server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT)
-            else:
-                server = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
-            
-            server.login(SMTP_USER, SMTP_PASS)
-            server.sendmail(EMAIL_FROM, to_email, msg.as_string())
-            server.quit()
+            await smtp_pool.send(to_email, msg.as_string())
             return True
     except Exception as e:
         print(f"Email error: {str(e)}")
@@ -267,23 +1277,826 @@ class MembershipApplication(BaseModel):
     tax_number: str
     note: Optional[str] = None
 
+# Index Registry
+# Declares the indexes each endpoint relies on. Keys mirror the filters and
+# sorts used by the handlers below; `_id` is appended to sort indexes so ties
+# on the sort field resolve deterministically.
+INDEX_REGISTRY: Dict[str, List[Dict[str, Any]]] = {
+    "announcements": [
+        {"name": "published_at_id", "keys": [("published_at", -1), ("_id", -1)]},
+        {"name": "category_published_at_id", "keys": [("category", 1), ("published_at", -1), ("_id", -1)]},
+    ],
+    "documents": [
+        {"name": "created_at_id", "keys": [("created_at", -1), ("_id", -1)]},
+    ],
+    "visits": [
+        {"name": "date_id", "keys": [("date", -1), ("_id", -1)]},
+    ],
+    "press": [
+        {"name": "date_id", "keys": [("date", -1), ("_id", -1)]},
+    ],
+    "condolences": [
+        {"name": "date_id", "keys": [("date", -1), ("_id", -1)]},
+    ],
+    "trainings": [
+        {"name": "date_id", "keys": [("date", -1), ("_id", -1)]},
+    ],
+    "board_members": [
+        {"name": "order", "keys": [("order", 1)]},
+        {"name": "board_type_order", "keys": [("board_type", 1), ("order", 1)]},
+    ],
+    "page_sections": [
+        {"name": "page_key", "keys": [("page", 1), ("key", 1)]},
+    ],
+    "contacts": [
+        {"name": "created_at_id", "keys": [("created_at", -1), ("_id", -1)]},
+    ],
+    "membership_applications": [
+        {"name": "created_at_id", "keys": [("created_at", -1), ("_id", -1)]},
+        {"name": "email", "keys": [("email", 1)]},
+        {"name": "tax_number", "keys": [("tax_number", 1)]},
+    ],
+    "users": [
+        {"name": "email_unique", "keys": [("email", 1)], "unique": True},
+    ],
+    "files": [
+        {"name": "filename", "keys": [("filename", 1)]},
+        {"name": "ref_count", "keys": [("ref_count", 1)]},
+    ],
+    "jobs": [
+        {"name": "status_run_at", "keys": [("status", 1), ("run_at", 1)]},
+        {"name": "status_locked_until", "keys": [("status", 1), ("locked_until", 1)]},
+        {"name": "created_at_id", "keys": [("created_at", -1), ("_id", -1)]},
+        {"name": "status_created_at_id", "keys": [("status", 1), ("created_at", -1), ("_id", -1)]},
+    ],
+    "slow_queries": [
+        {"name": "created_at_id", "keys": [("created_at", -1), ("_id", -1)]},
+    ],
+    "search_postings": [
+        {"name": "term_collection_score", "keys": [("term", 1), ("collection", 1), ("score", -1)]},
+        {"name": "collection_doc_id", "keys": [("collection", 1), ("doc_id", 1)]},
+    ],
+    "sitemap_entries": [
+        {"name": "collection_doc_id", "keys": [("collection", 1), ("doc_id", 1)]},
+        {"name": "shard_order_doc_id", "keys": [("shard", 1), ("order", 1), ("doc_id", 1)]},
+    ],
+}
+
+def _index_signature(keys, unique: bool = False) -> tuple:
+    """Comparable form of an index definition (key order matters)"""
+    return (tuple((field, int(direction)) for field, direction in keys), bool(unique))
+
+async def inspect_indexes() -> Dict[str, Any]:
+    """Compare declared indexes against the database and report drift"""
+    report = {}
+    for collection_name, specs in INDEX_REGISTRY.items():
+        existing = await db[collection_name].index_information()
+        existing.pop("_id_", None)
+        missing, conflicting = [], []
+        for spec in specs:
+            current = existing.get(spec["name"])
+            if current is None:
+                missing.append(spec["name"])
+            elif _index_signature(current["key"], current.get("unique")) != _index_signature(spec["keys"], spec.get("unique")):
+                conflicting.append({
+                    "name": spec["name"],
+                    "expected": [list(k) for k in spec["keys"]],
+                    "actual": [list(k) for k in current["key"]],
+                })
+        declared = {spec["name"] for spec in specs}
+        extra = [name for name in existing if name not in declared]
+        report[collection_name] = {
+            "missing": missing,
+            "conflicting": conflicting,
+            "extra": extra,
+            "in_sync": not (missing or conflicting or extra),
+        }
+    return report
+
+async def ensure_indexes() -> Dict[str, Any]:
+    """Create missing indexes and rebuild conflicting ones.
+
+    Safe to run repeatedly. Extra indexes are reported but never dropped,
+    since they may have been added by hand for an ad-hoc investigation.
+    """
+    drift = await inspect_indexes()
+    created, rebuilt = [], []
+    for collection_name, specs in INDEX_REGISTRY.items():
+        collection = db[collection_name]
+        conflicting = {c["name"] for c in drift[collection_name]["conflicting"]}
+        for spec in specs:
+            name = spec["name"]
+            if name in conflicting:
+                await collection.drop_index(name)
+                rebuilt.append(f"{collection_name}.{name}")
+            elif name in drift[collection_name]["missing"]:
+                created.append(f"{collection_name}.{name}")
+            else:
+                continue
+            await collection.create_index(spec["keys"], name=name, unique=spec.get("unique", False))
+    return {"created": created, "rebuilt": rebuilt}
+
+# Totals
+# List endpoints read their totals from the `counters` collection instead of
+# running count_documents on every request. Every counter is seeded from an
+# exact count once, at startup (or by the admin rebuild), and then kept
+# current by the create/update/delete handlers; reads never count. Seeding
+# on first read raced with concurrent inserts, whose $inc could land between
+# the count and the upsert. Free-text searches are counted from the search
+# index instead (see search_documents).
+COUNTED_COLLECTIONS = {
+    "announcements", "documents", "visits", "press",
+    "condolences", "contacts", "membership_applications",
+}
+
+def _total_key(collection_name: str, category: Optional[str] = None) -> str:
+    return f"{collection_name}:category:{category}" if category else collection_name
+
+TOTALS_SEEDED_KEY = "_seeded"
+
+async def get_total(collection_name: str, category: Optional[str] = None) -> int:
+    # Seeding covers every collection and category, so a missing counter
+    # belongs to a category nothing has been written to yet
+    counter = await db.counters.find_one({"_id": _total_key(collection_name, category)})
+    return counter["total"] if counter else 0
+
+async def _inc_totals(keys: List[str], delta: int):
+    await db.counters.bulk_write(
+        [UpdateOne({"_id": key}, {"$inc": {"total": delta}}, upsert=True) for key in keys],
+        ordered=False
+    )
+
+async def adjust_total(collection_name: str, delta: int, category: Optional[str] = None):
+    keys = [_total_key(collection_name)]
+    if category:
+        keys.append(_total_key(collection_name, category))
+    await _inc_totals(keys, delta)
+
+async def move_category_total(collection_name: str, old_category: Optional[str], new_category: Optional[str]):
+    if old_category == new_category:
+        return
+    if old_category:
+        await _inc_totals([_total_key(collection_name, old_category)], -1)
+    if new_category:
+        await _inc_totals([_total_key(collection_name, new_category)], 1)
+
+async def rebuild_totals() -> Dict[str, int]:
+    """Recount every counter from scratch.
+
+    Writes landing during the recount can be missed, so run it while the
+    site is quiet; startup does it before this worker serves traffic.
+    """
+    totals = {}
+    for collection_name in sorted(COUNTED_COLLECTIONS):
+        totals[collection_name] = await db[collection_name].count_documents({})
+    for category in await db.announcements.distinct("category"):
+        if category:
+            totals[_total_key("announcements", category)] = await db.announcements.count_documents({"category": category})
+    await db.counters.delete_many({"_id": {"$nin": list(totals)}})
+    for key, total in totals.items():
+        await db.counters.update_one({"_id": key}, {"$set": {"total": total}}, upsert=True)
+    await db.counters.update_one({"_id": TOTALS_SEEDED_KEY}, {"$set": {"at": datetime.utcnow()}}, upsert=True)
+    return totals
+
+async def seed_totals():
+    """Seed the counters the first time the app starts against a database"""
+    if await db.counters.find_one({"_id": TOTALS_SEEDED_KEY}) is None:
+        totals = await rebuild_totals()
+        print(f"✅ Totals seeded for {len(totals)} counters")
+
+# Response Cache
+# Bounded in-process cache for public reads. Entries are tagged with the
+# collection they came from and, for detail routes, the document id, so a
+# write only drops the list pages of its collection plus its own detail
+# entry. Each worker has its own cache; CACHE_TTL_SECONDS bounds how long
+# another worker can serve a page that predates a write.
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+
+class ResponseCache:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def generation(self, collection: str) -> int:
+        return self._generations.get(collection, 0)
+
+    def get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: tuple, value: Any, generation: int):
+        # A write that landed while this value was being read makes it stale
+        if generation != self.generation(key[0]):
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, collection: str, doc_id: Union[str, List[str], None] = None):
+        """Drop the list entries of a collection and, if given, their detail entries"""
+        self._generations[collection] = self.generation(collection) + 1
+        doc_ids = set(doc_id) if isinstance(doc_id, list) else {doc_id}
+        stale = [
+            key for key in self._entries
+            if key[0] == collection and (key[1] is None or key[1] in doc_ids)
+        ]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+
+    def clear(self):
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+response_cache = ResponseCache(CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES)
+user_cache = ResponseCache(USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES)
+# ETag/Last-Modified inputs for http_cache, tagged like response_cache
+validator_cache = ResponseCache(CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES)
+
+def cached_response(collection: str):
+    """Cache a GET handler's result keyed on route and query params.
+
+    Detail handlers take the document id as `id`; it becomes part of the
+    key so updates and deletes can invalidate that entry alone.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            key = (collection, kwargs.get("id"), func.__name__, tuple(sorted(kwargs.items())))
+            value = response_cache.get(key)
+            if value is not None:
+                return value
+            generation = response_cache.generation(collection)
+            value = await func(**kwargs)
+            response_cache.set(key, value, generation)
+            return value
+        return wrapper
+    return decorator
+
+# HTTP Caching
+# Strong validators for read endpoints. Detail routes derive the ETag from
+# the document's updated_at/created_at; list routes from a per-collection
+# version stamp bumped by mark_changed on every write. A request whose
+# If-None-Match / If-Modified-Since still matches gets a 304 before the
+# handler runs, so the body is never fetched or serialized. Both inputs are
+# held in validator_cache: mark_changed stores the new version stamp and
+# drops the touched documents' entries, so this worker's validators never
+# cost a query; writes made by other workers show up within
+# CACHE_TTL_SECONDS, the same bound response_cache has.
+# HTTP_CACHE_CONTROL overrides the policy per route template, e.g.
+# {"/api/settings": "public, max-age=600, s-maxage=3600"}.
+DEFAULT_CACHE_CONTROL = {
+    "public": "public, max-age=60, s-maxage=300",
+    "private": "private, no-cache",
+}
+HTTP_CACHE_CONTROL_OVERRIDES: Dict[str, str] = json.loads(os.getenv("HTTP_CACHE_CONTROL", "{}"))
+
+# Composite endpoints cached and versioned as one unit, keyed by the
+# collections they read from
+COMPOSITE_SOURCES = {
+    "home": ["announcements", "visits"],
+    "search": ["announcements", "press", "trainings", "documents"],
+}
+
+async def mark_changed(collection: str, doc_id: Union[str, List[str], None] = None):
+    """Record a write: bump the collection version and drop cached reads.
+
+    Bulk writes pass every touched id at once so a batch costs one version
+    bump and one sitemap rebuild instead of one per item. Composites that
+    read from the collection are bumped and dropped along with it.
+    """
+    composites = [name for name, sources in COMPOSITE_SOURCES.items() if collection in sources]
+    for name in [collection, *composites]:
+        stamp = await db.collection_versions.find_one_and_update(
+            {"_id": name},
+            {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        validator_cache.invalidate(name, doc_id if name == collection else None)
+        validator_cache.set((name, None, "version"), stamp, validator_cache.generation(name))
+    response_cache.invalidate(collection, doc_id)
+    for name in composites:
+        response_cache.invalidate(name)
+    if collection in SITEMAP_SOURCES:
+        await schedule_sitemap_rebuild(collection, doc_id)
+
+def _http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+def _is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+async def version_stamp(collection: str) -> Dict:
+    key = (collection, None, "version")
+    stamp = validator_cache.get(key)
+    if stamp is None:
+        generation = validator_cache.generation(collection)
+        stamp = await db.collection_versions.find_one({"_id": collection}) or {}
+        validator_cache.set(key, stamp, generation)
+    return stamp
+
+async def document_stamp(collection: str, doc_id: str) -> Optional[Dict]:
+    """updated_at/created_at of a document, or None if it does not exist"""
+    key = (collection, doc_id, "document")
+    stamp = validator_cache.get(key)
+    if stamp is None:
+        generation = validator_cache.generation(collection)
+        stamp = await db[collection].find_one({"_id": ObjectId(doc_id)}, projection={"_id": 0, "updated_at": 1, "created_at": 1})
+        # Misses are not kept; the id may be created later
+        if stamp is not None:
+            validator_cache.set(key, stamp, generation)
+    return stamp
+
+def http_cache(collection: str, detail: bool = False, visibility: str = "public"):
+    """Route dependency adding ETag/Last-Modified/Cache-Control and answering 304s"""
+    async def dependency(request: Request, response: Response):
+        if detail:
+            doc_id = request.path_params.get("id", "")
+            if not ObjectId.is_valid(doc_id):
+                return
+            doc = await document_stamp(collection, doc_id)
+            if doc is None:
+                return
+            last_modified = doc.get("updated_at") or doc.get("created_at")
+            seed = f"{collection}:{doc_id}:{last_modified.isoformat() if last_modified else ''}"
+        else:
+            stamp = await version_stamp(collection)
+            last_modified = stamp.get("updated_at")
+            seed = f"{collection}:{stamp.get('version', 0)}:{request.url.query}"
+        etag = f'"{hashlib.sha1(seed.encode()).hexdigest()}"'
+        route_path = request.scope["route"].path
+        headers = {
+            "ETag": etag,
+            "Cache-Control": HTTP_CACHE_CONTROL_OVERRIDES.get(route_path, DEFAULT_CACHE_CONTROL[visibility]),
+        }
+        if last_modified:
+            headers["Last-Modified"] = _http_date(last_modified)
+        if _is_not_modified(request, etag, last_modified):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+    return dependency
+
+# Job Queue
+# Durable background work stored in the `jobs` collection. Workers claim a
+# job atomically with find_one_and_update and hold it for
+# JOB_VISIBILITY_TIMEOUT; a job whose worker died is picked up again once
+# that lapses. Failures are retried with exponential backoff until
+# max_attempts, after which the job is parked as "dead" for inspection.
+# Run `python worker.py` to drain the queue in separate processes and set
+# JOB_INLINE_WORKER=false so the web workers stop polling.
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_VISIBILITY_TIMEOUT = int(os.getenv("JOB_VISIBILITY_TIMEOUT", "300"))  # seconds
+JOB_BACKOFF_SECONDS = int(os.getenv("JOB_BACKOFF_SECONDS", "30"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_ERROR_BACKOFF_MAX = float(os.getenv("JOB_ERROR_BACKOFF_MAX", "60"))  # seconds
+JOB_INLINE_WORKER = os.getenv("JOB_INLINE_WORKER", "true").lower() == "true"
+
+JOB_HANDLERS: Dict[str, Any] = {}
+
+def job_handler(kind: str):
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+@job_handler("send_email")
+async def _send_email_job(payload: Dict):
+    if not await send_email(payload["to_email"], payload["subject"], payload["html_content"]):
+        raise RuntimeError(f"E-posta gönderilemedi: {payload['to_email']}")
+
+@job_handler("image_variants")
+async def _image_variants_job(payload: Dict):
+    await generate_image_variants(payload["filename"], payload["sha256"])
+
+@job_handler("upload_refs_rebuild")
+async def _upload_refs_rebuild_job(payload: Dict):
+    await rebuild_upload_refs()
+
+@job_handler("excerpt_backfill")
+async def _excerpt_backfill_job(payload: Dict):
+    await backfill_excerpts()
+
+async def enqueue_job(kind: str, payload: Dict, delay_seconds: int = 0, max_attempts: int = JOB_MAX_ATTEMPTS) -> str:
+    now = datetime.utcnow()
+    job = {
+        "kind": kind,
+        "payload": payload,
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_at": now + timedelta(seconds=delay_seconds),
+        "last_error": None,
+        "created_at": now,
+        "updated_at": now
+    }
+    result = await db.jobs.insert_one(job)
+    return str(result.inserted_id)
+
+async def claim_job(worker_id: str) -> Optional[Dict]:
+    now = datetime.utcnow()
+    return await db.jobs.find_one_and_update(
+        {"status": "queued", "run_at": {"$lte": now}},
+        {
+            "$set": {
+                "status": "running",
+                "locked_by": worker_id,
+                "lock_token": uuid.uuid4().hex,
+                "locked_until": now + timedelta(seconds=JOB_VISIBILITY_TIMEOUT),
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("run_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+def _owned(job: Dict) -> Dict:
+    # Only the claim that still holds the lock may settle the job
+    return {"_id": job["_id"], "status": "running", "lock_token": job["lock_token"]}
+
+async def complete_job(job: Dict):
+    now = datetime.utcnow()
+    await db.jobs.update_one(_owned(job), {
+        "$set": {"status": "done", "finished_at": now, "updated_at": now},
+        "$unset": {"locked_until": "", "lock_token": ""}
+    })
+
+async def fail_job(job: Dict, error: str):
+    now = datetime.utcnow()
+    if job["attempts"] >= job.get("max_attempts", JOB_MAX_ATTEMPTS):
+        update = {"status": "dead", "finished_at": now}
+    else:
+        backoff = JOB_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1)
+        update = {"status": "queued", "run_at": now + timedelta(seconds=backoff)}
+    await db.jobs.update_one(_owned(job), {
+        "$set": {**update, "last_error": error, "updated_at": now},
+        "$unset": {"locked_until": "", "lock_token": ""}
+    })
+
+async def requeue_expired_jobs() -> int:
+    """Treat jobs whose visibility timeout lapsed as failed attempts"""
+    expired = await db.jobs.find({
+        "status": "running",
+        "locked_until": {"$lte": datetime.utcnow()}
+    }).to_list(length=100)
+    for job in expired:
+        await fail_job(job, "Visibility timeout exceeded")
+    return len(expired)
+
+async def run_job(job: Dict):
+    handler = JOB_HANDLERS.get(job["kind"])
+    if handler is None:
+        await fail_job({**job, "attempts": job.get("max_attempts", JOB_MAX_ATTEMPTS)}, f"Unknown job kind: {job['kind']}")
+        return
+    try:
+        await handler(job["payload"])
+    except Exception as e:
+        print(f"Job error ({job['kind']} {job['_id']}, attempt {job['attempts']}): {str(e)}")
+        await fail_job(job, str(e))
+    else:
+        await complete_job(job)
+
+async def _wait_for_stop(stop: asyncio.Event, seconds: float):
+    try:
+        await asyncio.wait_for(stop.wait(), timeout=seconds)
+    except asyncio.TimeoutError:
+        pass
+
+async def run_worker(worker_id: str, stop: Optional[asyncio.Event] = None):
+    """Claim and run jobs until `stop` is set.
+
+    Queue errors (a dropped connection while claiming, completing or
+    reaping) are logged and retried with exponential backoff instead of
+    ending the loop; the job itself is picked up again once its visibility
+    timeout lapses.
+    """
+    stop = stop or asyncio.Event()
+    last_reap = 0.0
+    errors = 0
+    while not stop.is_set():
+        try:
+            if time.monotonic() - last_reap > JOB_POLL_INTERVAL * 10:
+                await requeue_expired_jobs()
+                last_reap = time.monotonic()
+            job = await claim_job(worker_id)
+            if job is not None:
+                await run_job(job)
+            errors = 0
+        except Exception as e:
+            errors += 1
+            delay = min(JOB_POLL_INTERVAL * 2 ** errors, JOB_ERROR_BACKOFF_MAX)
+            print(f"Worker {worker_id} error (retrying in {delay:.1f}s): {str(e)}")
+            await _wait_for_stop(stop, delay)
+            continue
+        if job is None:
+            await _wait_for_stop(stop, JOB_POLL_INTERVAL)
+
+async def supervise_worker(worker_id: str, stop: asyncio.Event):
+    """Run `run_worker`, starting it again if it ever exits before `stop`"""
+    while not stop.is_set():
+        try:
+            await run_worker(worker_id, stop)
+        except Exception as e:
+            print(f"Worker {worker_id} crashed, restarting: {str(e)}")
+            await _wait_for_stop(stop, JOB_ERROR_BACKOFF_MAX)
+
+_inline_worker: Optional[asyncio.Task] = None
+_inline_worker_stop = asyncio.Event()
+
+# Response Compression
+# API responses above COMPRESSION_MIN_SIZE are compressed with the best
+# encoding the client accepts (brotli when the module is installed, else
+# gzip). Levels can be set per route template through COMPRESSION_LEVELS,
+# e.g. {"/api/documents": {"br": 6, "gzip": 9}}; a level of 0 turns
+# compression off for that route. Responses that are already encoded, such
+# as the gzipped sitemap, pass through untouched. Compressed responses get
+# a weak ETag, which _is_not_modified accepts back.
+#
+# Compressible uploads get .br/.gz sidecars written once by a job right
+# after upload, and serve_upload picks those up directly.
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+DEFAULT_COMPRESSION_LEVELS = {"br": 4, "gzip": 6}
+COMPRESSION_LEVELS: Dict[str, Dict[str, int]] = json.loads(os.getenv("COMPRESSION_LEVELS", "{}"))
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/xml", "application/javascript", "image/svg+xml")
+PRECOMPRESS_EXTENSIONS = {"pdf", "doc"}
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# Sidecars that save less than this fraction of the original are dropped
+PRECOMPRESS_MIN_SAVING = 0.1
+SUPPORTED_ENCODINGS = ["br", "gzip"] if brotli else ["gzip"]
+
+def negotiate_encodings(accept_encoding: str) -> List[str]:
+    """Supported encodings the client accepts, best first"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name] = q
+    accepted = []
+    for encoding in SUPPORTED_ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > 0:
+            accepted.append((q, encoding))
+    # Stable sort keeps server preference (br first) among equal weights
+    return [encoding for _, encoding in sorted(accepted, key=lambda item: -item[0])]
+
+def _compressor(encoding: str, level: int):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encodings = negotiate_encodings(Headers(scope=scope).get("accept-encoding", ""))
+
+        start_message = None
+        compress = finish = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compress, finish, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                if start_message is not None:
+                    # zerocopysend/pathsend bodies go out as they are, after
+                    # the start message we were holding back
+                    start, start_message = start_message, None
+                    passthrough = True
+                    await send(start)
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                start, start_message = start_message, None
+                headers = MutableHeaders(raw=start["headers"])
+                encoding = encodings[0] if encodings else None
+                route = scope.get("route")
+                levels = {**DEFAULT_COMPRESSION_LEVELS, **COMPRESSION_LEVELS.get(getattr(route, "path", ""), {})}
+                compressible = (
+                    start["status"] >= 200 and start["status"] not in (204, 304)
+                    and "content-encoding" not in headers
+                    and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                )
+                if compressible:
+                    # The representation depends on Accept-Encoding even when it goes out plain
+                    headers.add_vary_header("Accept-Encoding")
+                if (
+                    not compressible
+                    or not levels.get(encoding)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compress, finish = _compressor(encoding, levels[encoding])
+                headers["Content-Encoding"] = encoding
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                if more_body:
+                    del headers["content-length"]
+                    await send(start)
+                else:
+                    body = compress(body) + finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+            chunk = compress(body)
+            if not more_body:
+                chunk += finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+app.add_middleware(CompressionMiddleware)
+
+# Upload Size Limit
+# Multipart bodies are spooled by Starlette before a handler runs, so the
+# per-file check in save_upload alone would only fire once an oversized
+# body was already on disk. Upload routes are capped here instead: a
+# declared Content-Length over the cap is refused before any byte is read,
+# and a body that crosses it while streaming is cut off with 413 on the
+# chunk that crosses it.
+UPLOAD_MULTIPART_OVERHEAD = 64 * 1024  # boundaries, part headers and form fields
+MEMBERSHIP_MAX_UPLOAD_SIZE = int(os.getenv("MEMBERSHIP_MAX_UPLOAD_SIZE", str(5 * MAX_FILE_SIZE)))
+UPLOAD_BODY_LIMITS = {
+    "/api/upload": MAX_FILE_SIZE + UPLOAD_MULTIPART_OVERHEAD,
+    "/api/membership": MEMBERSHIP_MAX_UPLOAD_SIZE + UPLOAD_MULTIPART_OVERHEAD,
+}
+UPLOAD_TOO_LARGE_DETAIL = "Dosya boyutu çok büyük (max 10MB)"
+
+class UploadSizeLimitMiddleware:
+    def __init__(self, app, limits: Dict[str, int] = UPLOAD_BODY_LIMITS):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse({"detail": UPLOAD_TOO_LARGE_DETAIL}, status_code=413, headers={"Connection": "close"})
+            await response(scope, receive, send)
+            return
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside body parsing, which FastAPI re-raises as is
+                    raise HTTPException(status_code=413, detail=UPLOAD_TOO_LARGE_DETAIL)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+app.add_middleware(UploadSizeLimitMiddleware)
+
+def write_precompressed(path: Path) -> List[str]:
+    """Write .br/.gz sidecars next to a stored upload; returns the encodings kept"""
+    data = path.read_bytes()
+    written = []
+    for encoding in SUPPORTED_ENCODINGS:
+        if encoding == "br":
+            compressed = brotli.compress(data, quality=11)
+        else:
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        sidecar = Path(f"{path}{PRECOMPRESSED_SUFFIXES[encoding]}")
+        if len(compressed) > len(data) * (1 - PRECOMPRESS_MIN_SAVING):
+            sidecar.unlink(missing_ok=True)
+            continue
+        tmp = sidecar.with_name(f".{sidecar.name}.part")
+        tmp.write_bytes(compressed)
+        os.replace(tmp, sidecar)
+        written.append(encoding)
+    return written
+
+@job_handler("precompress_upload")
+async def _precompress_upload_job(payload: Dict):
+    path = UPLOAD_DIR / payload["filename"]
+    if path.exists():
+        await run_in_threadpool(write_precompressed, path)
+
 # Seed default admin users
 @app.on_event("startup")
 async def startup_event():
+    # Slow reads are explained and logged from this loop
+    slow_query_log.loop = asyncio.get_running_loop()
+    try:
+        await ensure_slow_query_log()
+    except Exception as e:
+        print(f"Slow query log setup error: {str(e)}")
+
+    # Reconcile declared indexes before serving traffic
+    try:
+        index_result = await ensure_indexes()
+        if index_result["created"] or index_result["rebuilt"]:
+            print(f"✅ Indexes reconciled: {index_result}")
+    except Exception as e:
+        print(f"Index sync error: {str(e)}")
+
+    # Announcements written before excerpts existed get one, once, by a job
+    await schedule_excerpt_backfill()
+
+    # List totals are read from counters, which must exist before any request
+    await seed_totals()
+
+    # Searchable data written before the search index existed gets indexed
+    await schedule_search_backfill()
+
+    # File records from when uploads counted themselves get recounted
+    await schedule_upload_refs_rebuild()
+
+    # The first sitemap is built by the job queue, not by its first request
+    if await db.sitemaps.find_one({"_id": "sitemap.xml"}, projection={"_id": 1}) is None:
+        await schedule_sitemap_rebuild()
+
     # Check if admin users exist
     admin_count = await db.users.count_documents({"role": "admin"})
     if admin_count == 0:
         # Create 2 default admin users
+        hash1, hash2 = await asyncio.gather(hash_password("admin123"), hash_password("admin123"))
         admin1 = {
             "email": "admin@keeso.gov.tr",
-            "password_hash": get_password_hash("admin123"),
+            "password_hash": hash1,
             "role": "admin",
             "name": "Admin Kullanıcı 1",
             "created_at": datetime.utcnow()
         }
         admin2 = {
             "email": "admin2@keeso.gov.tr",
-            "password_hash": get_password_hash("admin123"),
+            "password_hash": hash2,
             "role": "admin",
             "name": "Admin Kullanıcı 2",
             "created_at": datetime.utcnow()
@@ -298,6 +2111,7 @@ async def startup_event():
         {"email": "editor@keeso.gov.tr"},
         {"$set": {"role": "admin", "name": "Admin Kullanıcı 2"}}
     )
+    user_cache.invalidate("users", "editor@keeso.gov.tr")
     
     # Seed default settings
     settings = await db.settings.find_one({})
@@ -316,15 +2130,38 @@ async def startup_event():
         await db.settings.insert_one(default_settings)
         print("✅ Default settings created")
 
+    # Drain the job queue from this process unless dedicated workers do it
+    global _inline_worker
+    if JOB_INLINE_WORKER and _inline_worker is None:
+        _inline_worker = asyncio.create_task(supervise_worker(f"inline-{os.getpid()}", _inline_worker_stop))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if _inline_worker is not None:
+        _inline_worker_stop.set()
+        await _inline_worker
+    if _image_pool is not None:
+        _image_pool.shutdown(wait=False, cancel_futures=True)
+    password_hasher._executor.shutdown(wait=False, cancel_futures=True)
+    await smtp_pool.close()
+
 # Auth Endpoints
 @app.post("/api/auth/login")
 async def login(credentials: LoginRequest):
     user = await db.users.find_one({"email": credentials.email})
-    if not user or not verify_password(credentials.password, user["password_hash"]):
+    if not user:
         raise HTTPException(status_code=401, detail="Email veya şifre hatalı")
+    valid, new_hash = await verify_and_update_password(credentials.password, user["password_hash"])
+    if not valid:
+        raise HTTPException(status_code=401, detail="Email veya şifre hatalı")
+    if new_hash:
+        # Stored hash used a different bcrypt cost; upgrade it in place
+        await db.users.update_one({"_id": user["_id"]}, {"$set": {"password_hash": new_hash}})
+        user_cache.invalidate("users", user["email"])
+        user["password_hash"] = new_hash
     
     access_token = create_access_token(
-        data={"sub": user["email"], "role": user["role"]},
+        data={"sub": user["email"], "role": user["role"], "ver": user.get("token_version", 0)},
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     
@@ -337,48 +2174,256 @@ async def login(credentials: LoginRequest):
 # File Upload Endpoint
 @app.post("/api/upload")
 async def upload_file(file: UploadFile = File(...)):
-    # Validate file size
-    contents = await file.read()
-    if len(contents) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="Dosya boyutu çok büyük (max 10MB)")
-    
     # Validate file extension
     file_ext = file.filename.split(".")[-1].lower()
     if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(status_code=400, detail="Desteklenmeyen dosya tipi")
     
-    # Generate unique filename
+    # Stream to disk, enforcing the size limit as we go
+    saved = await save_upload(file, file_ext)
+    if saved is None:
+        raise HTTPException(status_code=400, detail="Dosya boyutu çok büyük (max 10MB)")
+    
+    # Resized variants and compressed sidecars are written by the job worker
+    if file_ext in IMAGE_EXTENSIONS:
+        await enqueue_job("image_variants", {"filename": saved["filename"], "sha256": saved["sha256"]})
+    if file_ext in PRECOMPRESS_EXTENSIONS and storage.name == "local":
+        await enqueue_job("precompress_upload", {"filename": saved["filename"]})
+    
+    # Return file URL
+    file_url = saved["file_url"]
+    return {
+        "file_url": file_url,
+        "filename": saved["filename"],
+        "size": saved["size"],
+        "sha256": saved["sha256"],
+        "deduplicated": saved["deduplicated"]
+    }
+
+class PresignedUploadRequest(BaseModel):
+    filename: str
+    size: int
+    content_type: Optional[str] = None
+
+@app.post("/api/upload/presign")
+async def presign_upload(request: PresignedUploadRequest):
+    file_ext = request.filename.split(".")[-1].lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Desteklenmeyen dosya tipi")
+    if request.size <= 0 or request.size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail="Dosya boyutu çok büyük (max 10MB)")
+    
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     random_id = uuid.uuid4().hex[:8]
     safe_filename = f"{timestamp}_{random_id}.{file_ext}"
-    file_path = UPLOAD_DIR / safe_filename
-    
-    # Save file
-    with open(file_path, "wb") as f:
-        f.write(contents)
+    content_type = request.content_type or mimetypes.guess_type(safe_filename)[0] or "application/octet-stream"
+    upload_url = storage.presign_upload(safe_filename, content_type, request.size)
+    if upload_url is None:
+        raise HTTPException(status_code=400, detail="Doğrudan yükleme bu depolama sürücüsünde desteklenmiyor")
     
-    # Return file URL
-    file_url = f"/uploads/{safe_filename}"
-    return {"file_url": file_url, "filename": safe_filename}
+    return {
+        "upload_url": upload_url,
+        "method": "PUT",
+        "headers": {"Content-Type": content_type},
+        "file_url": storage.url(safe_filename),
+        "filename": safe_filename,
+        "expires_in": PRESIGNED_URL_EXPIRES
+    }
+
+# Upload Serving
+# Upload filenames never get reused (content hashes, or timestamp plus a
+# random id), so files are served as immutable with a one-year max-age.
+# Single byte ranges are honoured for resumed downloads and media seeking;
+# multi-range requests get the whole file. The body goes out through the
+# server's zero-copy sendfile extension when it offers one and through
+# pathsend or a chunked read otherwise. Requests without a Range prefer a
+# .br/.gz sidecar (see precompress_upload) when the client accepts it.
+UPLOAD_CACHE_CONTROL = os.getenv("UPLOAD_CACHE_CONTROL", "public, max-age=31536000, immutable")
+
+class UploadResponse(FileResponse):
+    """FileResponse that can send a single byte range, zero-copy when possible"""
+    def __init__(self, path: Path, stat_result: os.stat_result, headers: Dict[str, str], media_type: str, byte_range: Optional[tuple] = None):
+        headers = dict(headers)
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+            headers["Content-Length"] = str(end - start + 1)
+        super().__init__(path, status_code=206 if byte_range else 200, headers=headers, media_type=media_type, stat_result=stat_result)
+        self.byte_range = byte_range
+
+    async def __call__(self, scope, receive, send):
+        zerocopy = "http.response.zerocopysend" in scope.get("extensions", {})
+        if scope["method"].upper() == "HEAD" or (self.byte_range is None and not zerocopy):
+            await super().__call__(scope, receive, send)
+            return
+        start, end = self.byte_range or (0, self.stat_result.st_size - 1)
+        count = end - start + 1
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if zerocopy:
+            file = await run_in_threadpool(open, self.path, "rb")
+            try:
+                await send({"type": "http.response.zerocopysend", "file": file, "offset": start, "count": count})
+            finally:
+                await run_in_threadpool(file.close)
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(start)
+                while count > 0:
+                    chunk = await file.read(min(self.chunk_size, count))
+                    if not chunk:
+                        break
+                    count -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": count > 0})
+                if count > 0:
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+def parse_byte_range(header: str, size: int) -> Optional[tuple]:
+    """(start, end) for a single-range header; None when it should be ignored.
+
+    Raises HTTPException(416) when the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        elif last:
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+def _upload_path(key: str) -> Path:
+    # Temp files and hidden work directories start with a dot
+    if any(part.startswith(".") or not part for part in key.split("/")):
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı")
+    path = (UPLOAD_DIR / key).resolve()
+    if not path.is_relative_to(UPLOAD_DIR.resolve()) or not path.is_file():
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı")
+    return path
+
+@app.api_route("/uploads/{key:path}", methods=["GET", "HEAD"])
+async def serve_upload(key: str, request: Request):
+    path = await run_in_threadpool(_upload_path, key)
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    range_header = request.headers.get("range")
+    headers = {"Cache-Control": UPLOAD_CACHE_CONTROL, "Accept-Ranges": "bytes"}
+    served = path
+    if path.suffix.lstrip(".").lower() in PRECOMPRESS_EXTENSIONS:
+        headers["Vary"] = "Accept-Encoding"
+        if not range_header:
+            for encoding in negotiate_encodings(request.headers.get("accept-encoding", "")):
+                sidecar = Path(f"{path}{PRECOMPRESSED_SUFFIXES[encoding]}")
+                if await run_in_threadpool(sidecar.is_file):
+                    served = sidecar
+                    headers["Content-Encoding"] = encoding
+                    break
+    stat_result = await run_in_threadpool(os.stat, served)
+    response = UploadResponse(served, stat_result, headers, media_type)
+    etag = response.headers["etag"]
+    last_modified = datetime.utcfromtimestamp(stat_result.st_mtime)
+    if _is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers={
+            "ETag": etag,
+            "Last-Modified": response.headers["last-modified"],
+            **{name: value for name, value in headers.items() if name != "Content-Encoding"}
+        })
+    if range_header:
+        # A stale If-Range means the client's partial copy is outdated: send it all
+        if_range = request.headers.get("if-range")
+        if if_range is None or if_range.strip() in (etag, response.headers["last-modified"]):
+            byte_range = parse_byte_range(range_header, stat_result.st_size)
+            if byte_range:
+                return UploadResponse(served, stat_result, headers, media_type, byte_range)
+    return response
+
+# Image Variants
+@app.get("/api/images/variants")
+async def get_image_variants(url: str):
+    key = storage.key_from_url(url)
+    record = await db.files.find_one({"filename": key}, projection={"variants": 1}) if key else None
+    variants = (record or {}).get("variants", [])
+    return {
+        "src": url,
+        "variants": variants,
+        "srcset": {fmt: build_srcset(variants, fmt) for fmt in ("webp", "jpeg")}
+    }
+
+@app.get("/api/images/resolve")
+async def resolve_image(url: str, width: int = 640, format: str = "webp"):
+    """Redirect to the best-fitting variant, or the original if none exist yet.
+
+    Only stored uploads are resolved; the redirect target is always built
+    from the storage key, never taken from the query string.
+    """
+    key = storage.key_from_url(url)
+    record = await db.files.find_one({"filename": key}, projection={"filename": 1, "variants": 1}) if key else None
+    if record is None:
+        raise HTTPException(status_code=404, detail="Görsel bulunamadı")
+    variant = pick_variant(record.get("variants", []), width, format)
+    return RedirectResponse(variant["url"] if variant else storage.url(record["filename"]), status_code=302)
+
+# Homepage
+# Everything the homepage renders in one round trip. The queries run
+# concurrently, project only the card fields, and skip totals; the result
+# is cached and versioned as the "home" composite (see COMPOSITE_SOURCES).
+HOME_ANNOUNCEMENTS = 5
+HOME_VISITS = 3
+HOME_PROJECTIONS = {
+    "announcements": {"title": 1, "category": 1, "excerpt": 1, "published_at": 1},
+    "visits": {"title": 1, "date": 1, "description": 1, "cover_image": 1},
+}
+
+@app.get("/api/home", dependencies=[Depends(http_cache("home"))])
+@cached_response("home")
+async def get_home():
+    (announcements, _), (visits, _) = await asyncio.gather(
+        paginate(db.announcements, {}, "published_at", HOME_ANNOUNCEMENTS, projection=HOME_PROJECTIONS["announcements"]),
+        paginate(db.visits, {}, "date", HOME_VISITS, projection=HOME_PROJECTIONS["visits"]),
+    )
+    return {
+        "announcements": [serialize_doc(a) for a in announcements],
+        "visits": [serialize_doc(v) for v in visits]
+    }
 
 # Announcements CRUD
-@app.get("/api/announcements")
-async def get_announcements(category: Optional[str] = None, search: Optional[str] = None, limit: int = 10, skip: int = 0):
+@app.get("/api/announcements", dependencies=[Depends(http_cache("announcements"))])
+@cached_response("announcements")
+async def get_announcements(category: Optional[str] = None, search: Optional[str] = None, limit: int = Query(10, ge=1, le=100), skip: int = Query(0, ge=0), cursor: Optional[str] = None, fields: Optional[str] = None):
+    projection = list_projection("announcements", fields)
+    if search:
+        # Ranked by relevance, so pages are offsets into the ranking
+        ranked, exact = await search_documents(search, ["announcements"], {"category": category} if category else None)
+        page = await load_search_results(ranked[skip:skip + limit], {"announcements": projection})
+        return {
+            "items": [serialize_doc(a) for _, a, _ in page],
+            "total": len(ranked),
+            "exact": exact,
+            "next_cursor": None
+        }
+
     query = {}
     if category:
         query["category"] = category
-    if search:
-        query["title"] = {"$regex": search, "$options": "i"}
-    
-    total = await db.announcements.count_documents(query)
-    announcements = await db.announcements.find(query).sort("published_at", -1).skip(skip).limit(limit).to_list(length=limit)
+    total = await get_total("announcements", category)
+    announcements, next_cursor = await paginate(db.announcements, query, "published_at", limit, skip, cursor, projection)
     
     return {
         "items": [serialize_doc(a) for a in announcements],
-        "total": total
+        "total": total,
+        "exact": True,
+        "next_cursor": next_cursor
     }
 
-@app.get("/api/announcements/{id}")
+@app.get("/api/announcements/{id}", dependencies=[Depends(http_cache("announcements", detail=True))])
+@cached_response("announcements")
 async def get_announcement(id: str):
     announcement = await db.announcements.find_one({"_id": ObjectId(id)})
     if not announcement:
@@ -390,10 +2435,15 @@ async def create_announcement(announcement: AnnouncementCreate):
     new_announcement = {
         **announcement.dict(),
         "slug": create_slug(announcement.title),
+        "excerpt": create_excerpt(announcement.content),
         "published_at": datetime.utcnow(),
         "created_at": datetime.utcnow()
     }
     result = await db.announcements.insert_one(new_announcement)
+    await retain_uploads("announcements", new_announcement)
+    await index_search_documents("announcements", result.inserted_id)
+    await adjust_total("announcements", 1, announcement.category)
+    await mark_changed("announcements", str(result.inserted_id))
     new_announcement["id"] = str(result.inserted_id)
     return serialize_doc(new_announcement)
 
@@ -402,31 +2452,44 @@ async def update_announcement(id: str, announcement: AnnouncementCreate):
     updated_data = {
         **announcement.dict(),
         "slug": create_slug(announcement.title),
+        "excerpt": create_excerpt(announcement.content),
         "updated_at": datetime.utcnow()
     }
-    result = await db.announcements.update_one(
+    previous = await db.announcements.find_one_and_update(
         {"_id": ObjectId(id)},
-        {"$set": updated_data}
+        {"$set": updated_data},
+        projection={"category": 1, **_upload_projection("announcements")}
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Duyuru bulunamadı")
+    await replace_uploads("announcements", previous, updated_data)
+    await index_search_documents("announcements", id)
+    await move_category_total("announcements", previous.get("category"), announcement.category)
+    await mark_changed("announcements", id)
     return {"message": "Duyuru güncellendi"}
 
 @app.delete("/api/announcements/{id}")
 async def delete_announcement(id: str):
-    result = await db.announcements.delete_one({"_id": ObjectId(id)})
-    if result.deleted_count == 0:
+    deleted = await db.announcements.find_one_and_delete({"_id": ObjectId(id)}, projection={"category": 1, "cover_image": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Duyuru bulunamadı")
+    await release_uploads("announcements", deleted)
+    await index_search_documents("announcements", id)
+    await adjust_total("announcements", -1, deleted.get("category"))
+    await mark_changed("announcements", id)
     return {"message": "Duyuru silindi"}
 
 # Documents CRUD
-@app.get("/api/documents")
-async def get_documents(limit: int = 50, skip: int = 0):
-    total = await db.documents.count_documents({})
-    documents = await db.documents.find({}).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+@app.get("/api/documents", dependencies=[Depends(http_cache("documents"))])
+async def get_documents(limit: int = 50, skip: int = 0, cursor: Optional[str] = None, fields: Optional[str] = None):
+    projection = list_projection("documents", fields)
+    total = await get_total("documents")
+    documents, next_cursor = await paginate(db.documents, {}, "created_at", limit, skip, cursor, projection)
     return {
         "items": [serialize_doc(d) for d in documents],
-        "total": total
+        "total": total,
+        "exact": True,
+        "next_cursor": next_cursor
     }
 
 @app.post("/api/documents")
@@ -436,27 +2499,40 @@ async def create_document(document: DocumentCreate):
         "created_at": datetime.utcnow()
     }
     result = await db.documents.insert_one(new_document)
+    await retain_uploads("documents", new_document)
+    await index_search_documents("documents", result.inserted_id)
+    await adjust_total("documents", 1)
+    await mark_changed("documents")
     new_document["id"] = str(result.inserted_id)
     return serialize_doc(new_document)
 
 @app.delete("/api/documents/{id}")
 async def delete_document(id: str):
-    result = await db.documents.delete_one({"_id": ObjectId(id)})
-    if result.deleted_count == 0:
+    deleted = await db.documents.find_one_and_delete({"_id": ObjectId(id)})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Belge bulunamadı")
+    await release_uploads("documents", deleted)
+    await index_search_documents("documents", id)
+    await adjust_total("documents", -1)
+    await mark_changed("documents", id)
     return {"message": "Belge silindi"}
 
 # Visits (Ziyaretler) CRUD
-@app.get("/api/visits")
-async def get_visits(limit: int = 20, skip: int = 0):
-    total = await db.visits.count_documents({})
-    visits = await db.visits.find({}).sort("date", -1).skip(skip).limit(limit).to_list(length=limit)
+@app.get("/api/visits", dependencies=[Depends(http_cache("visits"))])
+@cached_response("visits")
+async def get_visits(limit: int = 20, skip: int = 0, cursor: Optional[str] = None, fields: Optional[str] = None):
+    projection = list_projection("visits", fields)
+    total = await get_total("visits")
+    visits, next_cursor = await paginate(db.visits, {}, "date", limit, skip, cursor, projection)
     return {
         "items": [serialize_doc(v) for v in visits],
-        "total": total
+        "total": total,
+        "exact": True,
+        "next_cursor": next_cursor
     }
 
-@app.get("/api/visits/{id}")
+@app.get("/api/visits/{id}", dependencies=[Depends(http_cache("visits", detail=True))])
+@cached_response("visits")
 async def get_visit(id: str):
     visit = await db.visits.find_one({"_id": ObjectId(id)})
     if not visit:
@@ -470,28 +2546,39 @@ async def create_visit(visit: VisitCreate):
         "created_at": datetime.utcnow()
     }
     result = await db.visits.insert_one(new_visit)
+    await retain_uploads("visits", new_visit)
+    await adjust_total("visits", 1)
+    await mark_changed("visits", str(result.inserted_id))
     new_visit["id"] = str(result.inserted_id)
     return serialize_doc(new_visit)
 
 @app.put("/api/visits/{id}")
 async def update_visit(id: str, visit: VisitCreate):
-    result = await db.visits.update_one(
+    updated_data = {**visit.dict(), "updated_at": datetime.utcnow()}
+    previous = await db.visits.find_one_and_update(
         {"_id": ObjectId(id)},
-        {"$set": {**visit.dict(), "updated_at": datetime.utcnow()}}
+        {"$set": updated_data},
+        projection=_upload_projection("visits")
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Ziyaret bulunamadı")
+    await replace_uploads("visits", previous, updated_data)
+    await mark_changed("visits", id)
     return {"message": "Ziyaret güncellendi"}
 
 @app.delete("/api/visits/{id}")
 async def delete_visit(id: str):
-    result = await db.visits.delete_one({"_id": ObjectId(id)})
-    if result.deleted_count == 0:
+    deleted = await db.visits.find_one_and_delete({"_id": ObjectId(id)})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Ziyaret bulunamadı")
+    await release_uploads("visits", deleted)
+    await adjust_total("visits", -1)
+    await mark_changed("visits", id)
     return {"message": "Ziyaret silindi"}
 
 # Payment Items CRUD
-@app.get("/api/payments")
+@app.get("/api/payments", dependencies=[Depends(http_cache("payments"))])
+@cached_response("payments")
 async def get_payments():
     payments = await db.payments.find({}).to_list(length=100)
     return [serialize_doc(p) for p in payments]
@@ -503,6 +2590,7 @@ async def create_payment(payment: PaymentItemCreate):
         "created_at": datetime.utcnow()
     }
     result = await db.payments.insert_one(new_payment)
+    await mark_changed("payments")
     new_payment["id"] = str(result.inserted_id)
     return serialize_doc(new_payment)
 
@@ -514,6 +2602,7 @@ async def update_payment(id: str, payment: PaymentItemCreate):
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Ödeme kalemi bulunamadı")
+    await mark_changed("payments", id)
     return {"message": "Ödeme güncellendi"}
 
 @app.delete("/api/payments/{id}")
@@ -521,16 +2610,19 @@ async def delete_payment(id: str):
     result = await db.payments.delete_one({"_id": ObjectId(id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Ödeme bulunamadı")
+    await mark_changed("payments", id)
     return {"message": "Ödeme silindi"}
 
 # Board Members CRUD
-@app.get("/api/board-members")
+@app.get("/api/board-members", dependencies=[Depends(http_cache("board_members"))])
+@cached_response("board_members")
 async def get_board_members(board_type: Optional[str] = None):
     query = {"board_type": board_type} if board_type else {}
     members = await db.board_members.find(query).sort("order", 1).to_list(length=100)
     return [serialize_doc(m) for m in members]
 
-@app.get("/api/board-members/{id}")
+@app.get("/api/board-members/{id}", dependencies=[Depends(http_cache("board_members", detail=True))])
+@cached_response("board_members")
 async def get_board_member(id: str):
     member = await db.board_members.find_one({"_id": ObjectId(id)})
     if not member:
@@ -544,33 +2636,43 @@ async def create_board_member(member: BoardMemberCreate):
         "created_at": datetime.utcnow()
     }
     result = await db.board_members.insert_one(new_member)
+    await retain_uploads("board_members", new_member)
+    await mark_changed("board_members")
     new_member["id"] = str(result.inserted_id)
     return serialize_doc(new_member)
 
 @app.put("/api/board-members/{id}")
 async def update_board_member(id: str, member: BoardMemberCreate):
-    result = await db.board_members.update_one(
+    updated_data = {**member.dict(), "updated_at": datetime.utcnow()}
+    previous = await db.board_members.find_one_and_update(
         {"_id": ObjectId(id)},
-        {"$set": {**member.dict(), "updated_at": datetime.utcnow()}}
+        {"$set": updated_data},
+        projection=_upload_projection("board_members")
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Üye bulunamadı")
+    await replace_uploads("board_members", previous, updated_data)
+    await mark_changed("board_members", id)
     return {"message": "Üye güncellendi"}
 
 @app.delete("/api/board-members/{id}")
 async def delete_board_member(id: str):
-    result = await db.board_members.delete_one({"_id": ObjectId(id)})
-    if result.deleted_count == 0:
+    deleted = await db.board_members.find_one_and_delete({"_id": ObjectId(id)})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Üye bulunamadı")
+    await release_uploads("board_members", deleted)
+    await mark_changed("board_members", id)
     return {"message": "Üye silindi"}
 
 # Trainings CRUD
-@app.get("/api/trainings")
-async def get_trainings():
-    trainings = await db.trainings.find({}).sort("date", -1).to_list(length=100)
+@app.get("/api/trainings", dependencies=[Depends(http_cache("trainings"))])
+@cached_response("trainings")
+async def get_trainings(fields: Optional[str] = None):
+    trainings = await db.trainings.find({}, projection=list_projection("trainings", fields)).sort("date", -1).to_list(length=100)
     return [serialize_doc(t) for t in trainings]
 
-@app.get("/api/trainings/{id}")
+@app.get("/api/trainings/{id}", dependencies=[Depends(http_cache("trainings", detail=True))])
+@cached_response("trainings")
 async def get_training(id: str):
     training = await db.trainings.find_one({"_id": ObjectId(id)})
     if not training:
@@ -584,37 +2686,51 @@ async def create_training(training: TrainingCreate):
         "created_at": datetime.utcnow()
     }
     result = await db.trainings.insert_one(new_training)
+    await retain_uploads("trainings", new_training)
+    await index_search_documents("trainings", result.inserted_id)
+    await mark_changed("trainings")
     new_training["id"] = str(result.inserted_id)
     return serialize_doc(new_training)
 
 @app.put("/api/trainings/{id}")
 async def update_training(id: str, training: TrainingCreate):
-    result = await db.trainings.update_one(
+    updated_data = {**training.dict(), "updated_at": datetime.utcnow()}
+    previous = await db.trainings.find_one_and_update(
         {"_id": ObjectId(id)},
-        {"$set": {**training.dict(), "updated_at": datetime.utcnow()}}
+        {"$set": updated_data},
+        projection=_upload_projection("trainings")
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Eğitim bulunamadı")
+    await replace_uploads("trainings", previous, updated_data)
+    await index_search_documents("trainings", id)
+    await mark_changed("trainings", id)
     return {"message": "Eğitim güncellendi"}
 
 @app.delete("/api/trainings/{id}")
 async def delete_training(id: str):
-    result = await db.trainings.delete_one({"_id": ObjectId(id)})
-    if result.deleted_count == 0:
+    deleted = await db.trainings.find_one_and_delete({"_id": ObjectId(id)})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Eğitim bulunamadı")
+    await release_uploads("trainings", deleted)
+    await index_search_documents("trainings", id)
+    await mark_changed("trainings", id)
     return {"message": "Eğitim silindi"}
 
 # Press (Basında Biz) CRUD
-@app.get("/api/press")
-async def get_press(limit: int = 20, skip: int = 0):
-    total = await db.press.count_documents({})
-    press_items = await db.press.find({}).sort("date", -1).skip(skip).limit(limit).to_list(length=limit)
+@app.get("/api/press", dependencies=[Depends(http_cache("press"))])
+async def get_press(limit: int = 20, skip: int = 0, cursor: Optional[str] = None, fields: Optional[str] = None):
+    projection = list_projection("press", fields)
+    total = await get_total("press")
+    press_items, next_cursor = await paginate(db.press, {}, "date", limit, skip, cursor, projection)
     return {
         "items": [serialize_doc(p) for p in press_items],
-        "total": total
+        "total": total,
+        "exact": True,
+        "next_cursor": next_cursor
     }
 
-@app.get("/api/press/{id}")
+@app.get("/api/press/{id}", dependencies=[Depends(http_cache("press", detail=True))])
 async def get_press_item(id: str):
     press_item = await db.press.find_one({"_id": ObjectId(id)})
     if not press_item:
@@ -628,37 +2744,53 @@ async def create_press(press: PressCreate):
         "created_at": datetime.utcnow()
     }
     result = await db.press.insert_one(new_press)
+    await retain_uploads("press", new_press)
+    await index_search_documents("press", result.inserted_id)
+    await adjust_total("press", 1)
+    await mark_changed("press")
     new_press["id"] = str(result.inserted_id)
     return serialize_doc(new_press)
 
 @app.put("/api/press/{id}")
 async def update_press(id: str, press: PressCreate):
-    result = await db.press.update_one(
+    updated_data = {**press.dict(), "updated_at": datetime.utcnow()}
+    previous = await db.press.find_one_and_update(
         {"_id": ObjectId(id)},
-        {"$set": {**press.dict(), "updated_at": datetime.utcnow()}}
+        {"$set": updated_data},
+        projection=_upload_projection("press")
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Haber bulunamadı")
+    await replace_uploads("press", previous, updated_data)
+    await index_search_documents("press", id)
+    await mark_changed("press", id)
     return {"message": "Haber güncellendi"}
 
 @app.delete("/api/press/{id}")
 async def delete_press(id: str):
-    result = await db.press.delete_one({"_id": ObjectId(id)})
-    if result.deleted_count == 0:
+    deleted = await db.press.find_one_and_delete({"_id": ObjectId(id)})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Haber bulunamadı")
+    await release_uploads("press", deleted)
+    await index_search_documents("press", id)
+    await adjust_total("press", -1)
+    await mark_changed("press", id)
     return {"message": "Haber silindi"}
 
 # Condolences (Vefat ve Başsağlığı) CRUD
-@app.get("/api/condolences")
-async def get_condolences(limit: int = 20, skip: int = 0):
-    total = await db.condolences.count_documents({})
-    condolences = await db.condolences.find({}).sort("date", -1).skip(skip).limit(limit).to_list(length=limit)
+@app.get("/api/condolences", dependencies=[Depends(http_cache("condolences"))])
+async def get_condolences(limit: int = 20, skip: int = 0, cursor: Optional[str] = None, fields: Optional[str] = None):
+    projection = list_projection("condolences", fields)
+    total = await get_total("condolences")
+    condolences, next_cursor = await paginate(db.condolences, {}, "date", limit, skip, cursor, projection)
     return {
         "items": [serialize_doc(c) for c in condolences],
-        "total": total
+        "total": total,
+        "exact": True,
+        "next_cursor": next_cursor
     }
 
-@app.get("/api/condolences/{id}")
+@app.get("/api/condolences/{id}", dependencies=[Depends(http_cache("condolences", detail=True))])
 async def get_condolence(id: str):
     condolence = await db.condolences.find_one({"_id": ObjectId(id)})
     if not condolence:
@@ -672,6 +2804,8 @@ async def create_condolence(condolence: CondolenceCreate):
         "created_at": datetime.utcnow()
     }
     result = await db.condolences.insert_one(new_condolence)
+    await adjust_total("condolences", 1)
+    await mark_changed("condolences")
     new_condolence["id"] = str(result.inserted_id)
     return serialize_doc(new_condolence)
 
@@ -683,6 +2817,7 @@ async def update_condolence(id: str, condolence: CondolenceCreate):
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Kayıt bulunamadı")
+    await mark_changed("condolences", id)
     return {"message": "Kayıt güncellendi"}
 
 @app.delete("/api/condolences/{id}")
@@ -690,10 +2825,169 @@ async def delete_condolence(id: str):
     result = await db.condolences.delete_one({"_id": ObjectId(id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Kayıt bulunamadı")
+    await adjust_total("condolences", -1)
+    await mark_changed("condolences", id)
     return {"message": "Kayıt silindi"}
 
+# Bulk Operations
+# Batch create/update/delete for the CRUD collections, applied with a single
+# bulk_write. Items are validated against the same models as the single-item
+# endpoints; each one gets its own result entry. In ordered mode the batch
+# stops at the first failing item and the rest are reported as skipped.
+# Totals, upload references and caches are settled once for the whole batch.
+BULK_MAX_OPERATIONS = int(os.getenv("BULK_MAX_OPERATIONS", "1000"))
+
+BULK_COLLECTIONS = {
+    "announcements": {"collection": "announcements", "model": AnnouncementCreate, "not_found": "Duyuru bulunamadı"},
+    "documents": {"collection": "documents", "model": DocumentCreate, "not_found": "Belge bulunamadı"},
+    "visits": {"collection": "visits", "model": VisitCreate, "not_found": "Ziyaret bulunamadı"},
+    "payments": {"collection": "payments", "model": PaymentItemCreate, "not_found": "Ödeme kalemi bulunamadı"},
+    "board-members": {"collection": "board_members", "model": BoardMemberCreate, "not_found": "Üye bulunamadı"},
+    "trainings": {"collection": "trainings", "model": TrainingCreate, "not_found": "Eğitim bulunamadı"},
+    "press": {"collection": "press", "model": PressCreate, "not_found": "Haber bulunamadı"},
+    "condolences": {"collection": "condolences", "model": CondolenceCreate, "not_found": "Kayıt bulunamadı"},
+}
+
+class BulkOperation(BaseModel):
+    op: str  # 'create', 'update' or 'delete'
+    id: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+
+class BulkRequest(BaseModel):
+    ordered: bool = True
+    operations: List[BulkOperation]
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors())
+
+def _bulk_fields(collection: str, data: Dict, creating: bool) -> Dict:
+    now = datetime.utcnow()
+    fields = dict(data)
+    if collection == "announcements":
+        fields["slug"] = create_slug(fields["title"])
+        fields["excerpt"] = create_excerpt(fields["content"])
+        if creating:
+            fields["published_at"] = now
+    fields["created_at" if creating else "updated_at"] = now
+    return fields
+
+@app.post("/api/{collection}/bulk")
+async def bulk_write_collection(collection: str, request: BulkRequest):
+    spec = BULK_COLLECTIONS.get(collection)
+    if spec is None:
+        raise HTTPException(status_code=404, detail="Koleksiyon bulunamadı")
+    if len(request.operations) > BULK_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"Tek seferde en fazla {BULK_MAX_OPERATIONS} işlem gönderilebilir")
+    name = spec["collection"]
+    coll = db[name]
+
+    # Current state of every document the batch updates or deletes
+    target_ids = [ObjectId(item.id) for item in request.operations if item.id and ObjectId.is_valid(item.id)]
+    projection = {"category": 1, **{field: 1 for field in UPLOAD_FIELDS.get(name, [])}}
+    existing = {}
+    if target_ids:
+        async for doc in coll.find({"_id": {"$in": target_ids}}, projection=projection):
+            existing[str(doc["_id"])] = doc
+
+    results: List[Dict[str, Any]] = []
+    planned = []  # (result index, write request)
+    halted = False
+    for index, item in enumerate(request.operations):
+        result = {"index": index, "op": item.op, "id": item.id}
+        results.append(result)
+        if halted:
+            result["status"] = "skipped"
+            continue
+        try:
+            if item.op not in ("create", "update", "delete"):
+                raise ValueError("Geçersiz işlem türü")
+            if item.op != "create" and (not item.id or item.id not in existing):
+                raise ValueError(spec["not_found"])
+            if item.op == "delete":
+                planned.append((index, DeleteOne({"_id": ObjectId(item.id)})))
+                result["previous"] = existing.pop(item.id)
+            else:
+                data = spec["model"](**(item.data or {})).dict()
+                if item.op == "create":
+                    doc = {"_id": ObjectId(), **_bulk_fields(name, data, creating=True)}
+                    result["id"] = str(doc["_id"])
+                    planned.append((index, InsertOne(doc)))
+                else:
+                    planned.append((index, UpdateOne({"_id": ObjectId(item.id)}, {"$set": _bulk_fields(name, data, creating=False)})))
+                    result["previous"] = dict(existing[item.id])
+                    existing[item.id].update({field: data.get(field) for field in projection})
+                result["current"] = data
+                result["category"] = data.get("category")
+            result["status"] = "pending"
+        except ValidationError as e:
+            result.update(status="error", error=_validation_message(e))
+            halted = request.ordered
+        except ValueError as e:
+            result.update(status="error", error=str(e))
+            halted = request.ordered
+
+    failed_at = {}
+    if planned:
+        try:
+            await coll.bulk_write([write for _, write in planned], ordered=request.ordered)
+        except BulkWriteError as e:
+            failed_at = {err["index"]: err.get("errmsg", "Yazma hatası") for err in e.details.get("writeErrors", [])}
+    first_failure = min(failed_at) if failed_at else None
+    for position, (index, _) in enumerate(planned):
+        result = results[index]
+        if position in failed_at:
+            result.update(status="error", error=failed_at[position])
+        elif request.ordered and first_failure is not None and position > first_failure:
+            result["status"] = "skipped"
+        else:
+            result["status"] = {"create": "created", "update": "updated", "delete": "deleted"}[result["op"]]
+
+    # Settle totals and upload references for what was actually applied
+    deltas: Dict[str, int] = {}
+    changed_ids = []
+    for result in results:
+        previous = result.pop("previous", None)
+        current = result.pop("current", None)
+        category = result.pop("category", None)
+        if result["status"] not in ("created", "updated", "deleted"):
+            continue
+        changed_ids.append(result["id"])
+        if result["status"] == "created":
+            await retain_uploads(name, current)
+        elif result["status"] == "updated":
+            await replace_uploads(name, previous, current)
+        else:
+            await release_uploads(name, previous)
+        if name not in COUNTED_COLLECTIONS:
+            continue
+        if result["status"] == "created":
+            moves = [(name, 1)] + ([(_total_key(name, category), 1)] if category else [])
+        elif result["status"] == "deleted":
+            old_category = previous.get("category")
+            moves = [(name, -1)] + ([(_total_key(name, old_category), -1)] if old_category else [])
+        else:
+            old_category = previous.get("category")
+            moves = []
+            if old_category != category:
+                if old_category:
+                    moves.append((_total_key(name, old_category), -1))
+                if category:
+                    moves.append((_total_key(name, category), 1))
+        for key, delta in moves:
+            deltas[key] = deltas.get(key, 0) + delta
+    for key, delta in deltas.items():
+        if delta:
+            await _inc_totals([key], delta)
+    if changed_ids:
+        await index_search_documents(name, changed_ids)
+        await mark_changed(name, changed_ids)
+
+    summary = {status: sum(1 for r in results if r["status"] == status) for status in ("created", "updated", "deleted", "error", "skipped")}
+    return {"ordered": request.ordered, "summary": summary, "results": results}
+
 # Page Sections CRUD
-@app.get("/api/page-sections")
+@app.get("/api/page-sections", dependencies=[Depends(http_cache("page_sections"))])
+@cached_response("page_sections")
 async def get_page_sections(page: Optional[str] = None):
     query = {"page": page} if page else {}
     sections = await db.page_sections.find(query).to_list(length=100)
@@ -709,6 +3003,7 @@ async def create_page_section(section: PageSectionCreate):
             {"_id": existing["_id"]},
             {"$set": {"content": section.content, "updated_at": datetime.utcnow()}}
         )
+        await mark_changed("page_sections")
         return {"message": "Bölüm güncellendi"}
     else:
         # Create new
@@ -717,11 +3012,13 @@ async def create_page_section(section: PageSectionCreate):
             "created_at": datetime.utcnow()
         }
         result = await db.page_sections.insert_one(new_section)
+        await mark_changed("page_sections")
         new_section["id"] = str(result.inserted_id)
         return serialize_doc(new_section)
 
 # Settings
-@app.get("/api/settings")
+@app.get("/api/settings", dependencies=[Depends(http_cache("settings"))])
+@cached_response("settings")
 async def get_settings():
     settings = await db.settings.find_one({})
     if not settings:
@@ -744,11 +3041,12 @@ async def update_settings(settings: SettingsUpdate):
             {"_id": current["_id"]},
             {"$set": {**settings.dict(exclude_none=True), "updated_at": datetime.utcnow()}}
         )
+    await mark_changed("settings")
     return {"message": "Ayarlar güncellendi"}
 
 # Contact Form
 @app.post("/api/contact")
-async def submit_contact_form(form: ContactFormSubmit, background_tasks: BackgroundTasks):
+async def submit_contact_form(form: ContactFormSubmit):
     # Save to database
     contact = {
         **form.dict(),
@@ -756,8 +3054,10 @@ async def submit_contact_form(form: ContactFormSubmit, background_tasks: Backgro
         "created_at": datetime.utcnow()
     }
     result = await db.contacts.insert_one(contact)
+    await adjust_total("contacts", 1)
+    await mark_changed("contacts")
     
-    # Send email notification in background
+    # Queue email notification
     email_html = f"""
     <html>
         <body>
@@ -772,23 +3072,28 @@ async def submit_contact_form(form: ContactFormSubmit, background_tasks: Backgro
         </body>
     </html>
     """
-    background_tasks.add_task(send_email, ADMIN_EMAIL, f"İletişim Formu - {form.name}", email_html)
+    await enqueue_job("send_email", {
+        "to_email": ADMIN_EMAIL,
+        "subject": f"İletişim Formu - {form.name}",
+        "html_content": email_html
+    })
     
     return {"message": "Mesajınız başarıyla gönderildi"}
 
-@app.get("/api/contacts")
-async def get_contacts(limit: int = 50, skip: int = 0):
-    total = await db.contacts.count_documents({})
-    contacts = await db.contacts.find({}).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+@app.get("/api/contacts", dependencies=[Depends(http_cache("contacts", visibility="private"))])
+async def get_contacts(limit: int = 50, skip: int = 0, cursor: Optional[str] = None):
+    total = await get_total("contacts")
+    contacts, next_cursor = await paginate(db.contacts, {}, "created_at", limit, skip, cursor)
     return {
         "items": [serialize_doc(c) for c in contacts],
-        "total": total
+        "total": total,
+        "exact": True,
+        "next_cursor": next_cursor
     }
 
 # Membership Application
 @app.post("/api/membership")
 async def submit_membership_application(
-    background_tasks: BackgroundTasks,
     name: str = Form(...),
     email: str = Form(...),
     phone: str = Form(...),
@@ -802,23 +3107,15 @@ async def submit_membership_application(
     if files:
         for file in files:
             if file.filename:
-                contents = await file.read()
-                if len(contents) > MAX_FILE_SIZE:
-                    continue
-                
                 file_ext = file.filename.split(".")[-1].lower()
                 if file_ext not in ALLOWED_EXTENSIONS:
                     continue
                 
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                random_id = uuid.uuid4().hex[:8]
-                safe_filename = f"{timestamp}_{random_id}.{file_ext}"
-                file_path = UPLOAD_DIR / safe_filename
-                
-                with open(file_path, "wb") as f:
-                    f.write(contents)
+                saved = await save_upload(file, file_ext)
+                if saved is None:
+                    continue
                 
-                file_urls.append(f"/uploads/{safe_filename}")
+                file_urls.append(saved["file_url"])
     
     # Save application
     application = {
@@ -833,6 +3130,9 @@ async def submit_membership_application(
         "created_at": datetime.utcnow()
     }
     result = await db.membership_applications.insert_one(application)
+    await retain_uploads("membership_applications", application)
+    await adjust_total("membership_applications", 1)
+    await mark_changed("membership_applications")
     
     # Send email notification
     email_html = f"""
@@ -851,17 +3151,23 @@ async def submit_membership_application(
         </body>
     </html>
     """
-    background_tasks.add_task(send_email, ADMIN_EMAIL, f"Üyelik Başvurusu - {name}", email_html)
+    await enqueue_job("send_email", {
+        "to_email": ADMIN_EMAIL,
+        "subject": f"Üyelik Başvurusu - {name}",
+        "html_content": email_html
+    })
     
     return {"message": "Başvurunuz başarıyla alındı"}
 
-@app.get("/api/membership")
-async def get_membership_applications(limit: int = 50, skip: int = 0):
-    total = await db.membership_applications.count_documents({})
-    applications = await db.membership_applications.find({}).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+@app.get("/api/membership", dependencies=[Depends(http_cache("membership_applications", visibility="private"))])
+async def get_membership_applications(limit: int = 50, skip: int = 0, cursor: Optional[str] = None):
+    total = await get_total("membership_applications")
+    applications, next_cursor = await paginate(db.membership_applications, {}, "created_at", limit, skip, cursor)
     return {
         "items": [serialize_doc(a) for a in applications],
-        "total": total
+        "total": total,
+        "exact": True,
+        "next_cursor": next_cursor
     }
 
 @app.get("/api/membership/status")
@@ -884,39 +3190,717 @@ async def check_membership_status(query: str = Query(..., description="Email or
     }
 
 # Sitemap
+# The sitemap is kept precompressed in the `sitemaps` collection instead of
+# being rendered per request. Every detail URL is stored as its own entry in
+# `sitemap_entries`, pinned to a numbered shard of at most
+# SITEMAP_SHARD_SIZE URLs; new entries fill the last shard. Writes record
+# the changed ids and a debounced job upserts or removes just those
+# entries, then re-renders only the shards they sit in. Up to
+# SITEMAP_SHARD_SIZE URLs go out as a single urlset; beyond that
+# sitemap.xml becomes an index over sitemap-pages.xml (static and listing
+# pages) and the numbered shards. The first build is queued at startup;
+# until it lands /api/sitemap.xml answers 503 with Retry-After.
+SITEMAP_BASE_URL = os.getenv("SITEMAP_BASE_URL", "https://keeso.gov.tr")
+SITEMAP_SHARD_SIZE = int(os.getenv("SITEMAP_SHARD_SIZE", "50000"))
+SITEMAP_REBUILD_DELAY = int(os.getenv("SITEMAP_REBUILD_DELAY", "10"))  # seconds, coalesces bursts of writes
+SITEMAP_BATCH_SIZE = 1000
+SITEMAP_RETRY_AFTER = 30  # seconds, while the first build is queued
+SITEMAP_FULL_KEY = "_all"  # sitemap_state key of a queued full rebuild
+SITEMAP_STATIC_PAGES = [
+    ("/", "1.0"),
+    ("/kurumsal", "0.8"),
+    ("/uyelik", "0.8"),
+    ("/hizmetler", "0.8"),
+    ("/odeme", "0.7"),
+    ("/iletisim", "0.8"),
+]
+# Collections with a public page. Press, trainings and condolences have no
+# detail route in the frontend, so they contribute their listing page only.
+SITEMAP_SOURCES = {
+    "announcements": {"listing": ("/duyurular", "0.9"), "detail": ("/duyurular/{id}", "0.6")},
+    "visits": {"listing": ("/ziyaretler", "0.7"), "detail": ("/ziyaretler/{id}", "0.6")},
+    "press": {"listing": ("/basinda-biz", "0.7"), "detail": None},
+    "trainings": {"listing": ("/egitim-seminerler", "0.7"), "detail": None},
+    "condolences": {"listing": ("/vefat-bassagligi", "0.6"), "detail": None},
+    "board_members": {"listing": ("/yonetim-kurulu", "0.7"), "detail": None},
+}
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+_SITEMAP_NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+def _w3c_date(value: Optional[datetime]) -> Optional[str]:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ") if value else None
+
+def _url_entry(path: str, priority: str, lastmod: Optional[datetime] = None) -> str:
+    entry = f"  <url>\n    <loc>{xml_escape(SITEMAP_BASE_URL + path)}</loc>\n"
+    if lastmod:
+        entry += f"    <lastmod>{_w3c_date(lastmod)}</lastmod>\n"
+    return entry + f"    <priority>{priority}</priority>\n  </url>\n"
+
+async def _sitemap_job_pending(job_id: Optional[str]) -> bool:
+    if not job_id:
+        return False
+    job = await db.jobs.find_one({"_id": ObjectId(job_id)}, projection={"status": 1})
+    return job is not None and job["status"] in ("queued", "running")
+
+async def schedule_sitemap_rebuild(collection: Optional[str] = None, doc_ids: Union[str, List[str], None] = None):
+    """Queue a sitemap update for `collection`, or a full rebuild without one.
+
+    Changed ids accumulate in sitemap_state until the job runs; a write
+    that names no ids makes the job rescan the whole collection. Only the
+    first write after a run enqueues a job and later ones ride along,
+    unless that job has since died.
+    """
+    update: Dict[str, Any] = {"$set": {"dirty": True}}
+    if collection and SITEMAP_SOURCES[collection]["detail"]:
+        if doc_ids:
+            update["$addToSet"] = {"ids": {"$each": doc_ids if isinstance(doc_ids, list) else [doc_ids]}}
+        else:
+            update["$set"]["full"] = True
+    key = collection or SITEMAP_FULL_KEY
+    previous = await db.sitemap_state.find_one_and_update({"_id": key}, update, upsert=True)
+    if previous and previous.get("dirty") and await _sitemap_job_pending(previous.get("job_id")):
+        return
+    job_id = await enqueue_job("sitemap_rebuild", {"collection": collection}, delay_seconds=SITEMAP_REBUILD_DELAY if collection else 0)
+    await db.sitemap_state.update_one({"_id": key}, {"$set": {"job_id": job_id}})
+
+def _sitemap_entry(collection: str, doc: Dict) -> str:
+    detail_path, detail_priority = SITEMAP_SOURCES[collection]["detail"]
+    lastmod = doc.get("updated_at") or doc.get("published_at") or doc.get("created_at")
+    return _url_entry(detail_path.format(id=doc["_id"]), detail_priority, lastmod)
+
+_SITEMAP_DOC_PROJECTION = {"updated_at": 1, "published_at": 1, "created_at": 1}
+
+async def _allocate_sitemap_slots(count: int) -> List[int]:
+    """Shard numbers for `count` new entries, filling the last shard first"""
+    slots: List[int] = []
+    while len(slots) < count:
+        last = await db.sitemap_shards.find_one({}, sort=[("_id", -1)])
+        if last is None or last["count"] >= SITEMAP_SHARD_SIZE:
+            number = last["_id"] + 1 if last else 1
+            try:
+                await db.sitemap_shards.insert_one({"_id": number, "count": 0})
+            except DuplicateKeyError:
+                pass  # another job opened it first
+            continue
+        take = min(count - len(slots), SITEMAP_SHARD_SIZE - last["count"])
+        # Conditional on the count read above, so concurrent jobs never overfill
+        result = await db.sitemap_shards.update_one({"_id": last["_id"], "count": last["count"]}, {"$inc": {"count": take}})
+        if result.modified_count:
+            slots.extend([last["_id"]] * take)
+    return slots
+
+async def update_sitemap_entries(collection: str, doc_ids: List[Any]) -> set:
+    """Upsert or remove the entries of the given documents; returns the shards touched"""
+    if not SITEMAP_SOURCES[collection]["detail"] or not doc_ids:
+        return set()
+    ids = [ObjectId(doc_id) for doc_id in doc_ids if ObjectId.is_valid(doc_id)]
+    docs = {doc["_id"]: doc async for doc in db[collection].find({"_id": {"$in": ids}}, projection=_SITEMAP_DOC_PROJECTION)}
+    existing = {
+        entry["doc_id"]: entry["shard"]
+        async for entry in db.sitemap_entries.find({"collection": collection, "doc_id": {"$in": ids}}, projection={"doc_id": 1, "shard": 1})
+    }
+    touched = set()
+    writes = []
+    removed: Dict[int, int] = {}
+    for doc_id, shard in existing.items():
+        touched.add(shard)
+        if doc_id in docs:
+            writes.append(UpdateOne({"_id": f"{collection}:{doc_id}"}, {"$set": {"entry": _sitemap_entry(collection, docs[doc_id])}}))
+        else:
+            writes.append(DeleteOne({"_id": f"{collection}:{doc_id}"}))
+            removed[shard] = removed.get(shard, 0) + 1
+    new_ids = [doc_id for doc_id in docs if doc_id not in existing]
+    order = list(SITEMAP_SOURCES).index(collection)
+    for doc_id, shard in zip(new_ids, await _allocate_sitemap_slots(len(new_ids))):
+        touched.add(shard)
+        writes.append(InsertOne({
+            "_id": f"{collection}:{doc_id}",
+            "collection": collection,
+            "order": order,
+            "doc_id": doc_id,
+            "shard": shard,
+            "entry": _sitemap_entry(collection, docs[doc_id]),
+        }))
+    if writes:
+        await db.sitemap_entries.bulk_write(writes, ordered=False)
+    for shard, count in removed.items():
+        await db.sitemap_shards.update_one({"_id": shard}, {"$inc": {"count": -count}})
+    return touched
+
+async def rescan_sitemap_entries(collection: str) -> set:
+    """Reconcile every entry of one collection, for writes that named no ids"""
+    if not SITEMAP_SOURCES[collection]["detail"]:
+        return set()
+    ids = {doc["_id"] async for doc in db[collection].find({}, projection={"_id": 1})}
+    ids.update([entry["doc_id"] async for entry in db.sitemap_entries.find({"collection": collection}, projection={"doc_id": 1})])
+    ids = sorted(ids)
+    touched = set()
+    for start in range(0, len(ids), SITEMAP_BATCH_SIZE):
+        touched |= await update_sitemap_entries(collection, ids[start:start + SITEMAP_BATCH_SIZE])
+    return touched
+
+async def pack_sitemap_entries():
+    """Drop every entry and lay them out again in full shards"""
+    await db.sitemap_entries.delete_many({})
+    await db.sitemap_shards.delete_many({})
+    shard, count, batch = 1, 0, []
+
+    async def close_shard():
+        if count:
+            await db.sitemap_shards.insert_one({"_id": shard, "count": count})
+
+    for order, (collection, source) in enumerate(SITEMAP_SOURCES.items()):
+        if not source["detail"]:
+            continue
+        async for doc in db[collection].find({}, projection=_SITEMAP_DOC_PROJECTION).sort("_id", 1):
+            if count >= SITEMAP_SHARD_SIZE:
+                await close_shard()
+                shard, count = shard + 1, 0
+            batch.append({
+                "_id": f"{collection}:{doc['_id']}",
+                "collection": collection,
+                "order": order,
+                "doc_id": doc["_id"],
+                "shard": shard,
+                "entry": _sitemap_entry(collection, doc),
+            })
+            count += 1
+            if len(batch) >= SITEMAP_BATCH_SIZE:
+                await db.sitemap_entries.insert_many(batch)
+                batch = []
+    if batch:
+        await db.sitemap_entries.insert_many(batch)
+    await close_shard()
+
+async def publish_sitemap(touched: Optional[set] = None) -> Dict[str, Any]:
+    """Render sitemap.xml and the shards in `touched` (None renders all).
+
+    Static pages and listing entries, whose lastmod follows every write,
+    are re-rendered each time; they are a handful of URLs.
+    """
+    now = datetime.utcnow()
+    stamps = {doc["_id"]: doc async for doc in db.collection_versions.find({"_id": {"$in": list(SITEMAP_SOURCES)}})}
+    pages = [_url_entry(path, priority) for path, priority in SITEMAP_STATIC_PAGES]
+    for collection, source in SITEMAP_SOURCES.items():
+        listing_path, listing_priority = source["listing"]
+        pages.append(_url_entry(listing_path, listing_priority, (stamps.get(collection) or {}).get("updated_at")))
+    shards = [shard async for shard in db.sitemap_shards.find({"count": {"$gt": 0}}).sort("_id", 1)]
+    url_count = len(pages) + sum(shard["count"] for shard in shards)
+    kind = "urlset" if len(shards) <= 1 and url_count <= SITEMAP_SHARD_SIZE else "index"
+    stored = {doc["_id"]: doc async for doc in db.sitemaps.find({}, projection={"generated_at": 1, "kind": 1})}
+    render_all = touched is None or (stored.get("sitemap.xml") or {}).get("kind") != kind
+
+    async def shard_entries(number: int) -> str:
+        cursor = db.sitemap_entries.find({"shard": number}, projection={"entry": 1}).sort([("order", 1), ("doc_id", 1)])
+        return "".join([entry["entry"] async for entry in cursor])
+
+    def urlset(entries: str) -> str:
+        return f"{_XML_HEADER}<urlset {_SITEMAP_NS}>\n{entries}</urlset>"
+
+    async def store(name: str, body: str, url_count: int) -> datetime:
+        data = gzip.compress(body.encode("utf-8"), mtime=0)
+        etag = f'"{hashlib.sha1(data).hexdigest()}"'
+        current_doc = await db.sitemaps.find_one({"_id": name}, projection={"etag": 1, "generated_at": 1})
+        if current_doc and current_doc["etag"] == etag:
+            # Unchanged content keeps its old Last-Modified
+            return current_doc["generated_at"]
+        await db.sitemaps.replace_one(
+            {"_id": name},
+            {"gz": Binary(data), "etag": etag, "generated_at": now, "url_count": url_count, "kind": kind},
+            upsert=True
+        )
+        return now
+
+    names = ["sitemap.xml"]
+    rendered = []
+    if kind == "urlset":
+        body = "".join(pages) + (await shard_entries(shards[0]["_id"]) if shards else "")
+        await store("sitemap.xml", urlset(body), url_count)
+        rendered.append("sitemap.xml")
+    else:
+        files = [("sitemap-pages.xml", None, len(pages))] + [(f"sitemap-{shard['_id']}.xml", shard["_id"], shard["count"]) for shard in shards]
+        index_entries = []
+        for name, number, count in files:
+            names.append(name)
+            if number is None or render_all or number in touched or name not in stored:
+                body = "".join(pages) if number is None else await shard_entries(number)
+                lastmod = await store(name, urlset(body), count)
+                rendered.append(name)
+            else:
+                lastmod = stored[name]["generated_at"]
+            index_entries.append(
+                f"  <sitemap>\n    <loc>{xml_escape(f'{SITEMAP_BASE_URL}/api/sitemaps/{name}.gz')}</loc>\n"
+                f"    <lastmod>{_w3c_date(lastmod)}</lastmod>\n  </sitemap>\n"
+            )
+        await store("sitemap.xml", f"{_XML_HEADER}<sitemapindex {_SITEMAP_NS}>\n{''.join(index_entries)}</sitemapindex>", url_count)
+        rendered.append("sitemap.xml")
+    await db.sitemaps.delete_many({"_id": {"$nin": names}})
+    return {"files": sorted(names), "url_count": url_count, "rendered": sorted(rendered)}
+
+async def refresh_sitemap(collection: str) -> Dict[str, Any]:
+    """Apply the writes recorded for one collection since the last run"""
+    state = await db.sitemap_state.find_one_and_update(
+        {"_id": collection},
+        {"$set": {"dirty": False, "full": False, "ids": []}},
+        upsert=True
+    ) or {}
+    try:
+        if state.get("full"):
+            touched = await rescan_sitemap_entries(collection)
+        else:
+            touched = await update_sitemap_entries(collection, state.get("ids", []))
+        return await publish_sitemap(touched)
+    except Exception:
+        # Hand the recorded writes back so the retry (or the next write,
+        # should this job die) still applies them
+        restore: Dict[str, Any] = {"$set": {"dirty": True}}
+        if state.get("full"):
+            restore["$set"]["full"] = True
+        if state.get("ids"):
+            restore["$addToSet"] = {"ids": {"$each": state["ids"]}}
+        await db.sitemap_state.update_one({"_id": collection}, restore, upsert=True)
+        raise
+
+async def rebuild_sitemap(collections: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Re-derive entries from the collections and republish every file.
+
+    Without `collections` the entries are repacked into full shards from
+    scratch; with them, only those collections are reconciled in place.
+    """
+    keys = collections or [*SITEMAP_SOURCES, SITEMAP_FULL_KEY]
+    for key in keys:
+        await db.sitemap_state.update_one({"_id": key}, {"$set": {"dirty": False, "full": False, "ids": []}}, upsert=True)
+    if collections is None:
+        await pack_sitemap_entries()
+    else:
+        for collection in collections:
+            await rescan_sitemap_entries(collection)
+    return await publish_sitemap()
+
+@job_handler("sitemap_rebuild")
+async def _sitemap_rebuild_job(payload: Dict):
+    if payload.get("collection"):
+        await refresh_sitemap(payload["collection"])
+        return
+    try:
+        await rebuild_sitemap()
+    except Exception:
+        await db.sitemap_state.update_one({"_id": SITEMAP_FULL_KEY}, {"$set": {"dirty": True}}, upsert=True)
+        raise
+
+async def serve_sitemap(request: Request, name: str, compressed: bool) -> Response:
+    doc = await db.sitemaps.find_one({"_id": name})
+    if doc is None and name == "sitemap.xml":
+        # Never built yet: the job queue builds it rather than this request
+        await schedule_sitemap_rebuild()
+        raise HTTPException(
+            status_code=503,
+            detail="Site haritası hazırlanıyor",
+            headers={"Retry-After": str(SITEMAP_RETRY_AFTER)}
+        )
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Site haritası bulunamadı")
+    headers = {
+        "ETag": doc["etag"],
+        "Last-Modified": _http_date(doc["generated_at"]),
+        "Cache-Control": HTTP_CACHE_CONTROL_OVERRIDES.get("/api/sitemap.xml", "public, max-age=3600"),
+        "Vary": "Accept-Encoding",
+    }
+    if _is_not_modified(request, doc["etag"], doc["generated_at"]):
+        return Response(status_code=304, headers=headers)
+    data = bytes(doc["gz"])
+    if compressed:
+        return Response(content=data, media_type="application/gzip", headers=headers)
+    if "gzip" in negotiate_encodings(request.headers.get("accept-encoding", "")):
+        return Response(content=data, media_type="application/xml", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(content=gzip.decompress(data), media_type="application/xml", headers=headers)
+
 @app.get("/api/sitemap.xml")
-async def generate_sitemap():
-    base_url = "https://keeso.gov.tr"
-    urls = [
-        {"loc": f"{base_url}/", "priority": "1.0"},
-        {"loc": f"{base_url}/kurumsal", "priority": "0.8"},
-        {"loc": f"{base_url}/uyelik", "priority": "0.8"},
-        {"loc": f"{base_url}/hizmetler", "priority": "0.8"},
-        {"loc": f"{base_url}/duyurular", "priority": "0.9"},
-        {"loc": f"{base_url}/ziyaretler", "priority": "0.7"},
-        {"loc": f"{base_url}/odeme", "priority": "0.7"},
-        {"loc": f"{base_url}/iletisim", "priority": "0.8"},
+async def generate_sitemap(request: Request):
+    return await serve_sitemap(request, "sitemap.xml", compressed=False)
+
+@app.get("/api/sitemap.xml.gz")
+async def get_compressed_sitemap(request: Request):
+    return await serve_sitemap(request, "sitemap.xml", compressed=True)
+
+@app.get("/api/sitemaps/{name}")
+async def get_sitemap_shard(name: str, request: Request):
+    compressed = name.endswith(".gz")
+    return await serve_sitemap(request, name.removesuffix(".gz"), compressed=compressed)
+
+@app.post("/api/admin/sitemap/rebuild")
+async def rebuild_sitemap_now():
+    return await rebuild_sitemap()
+
+# Search
+# Full-text search over announcements, press, trainings and documents,
+# backed by an inverted index in `search_postings` instead of regex scans.
+# Text is folded with fold_turkish, so "ŞUBAT", "Şubat" and "subat" meet on
+# the same term. Write handlers re-index the documents they touch, and
+# `search_terms` keeps each term's document frequency for idf. A query reads
+# at most SEARCH_POSTINGS_LIMIT postings per term, best first from the
+# (term, collection, score) index, so its cost follows the query rather
+# than the collection size. Words of SEARCH_MIN_PREFIX letters or more also
+# match up to SEARCH_MAX_EXPANSIONS longer terms they prefix ("semin" →
+# "seminer", "semineri"), which covers Turkish suffixes without a stemmer.
+# The most frequent of those terms win, so a rare typo indexed under the
+# prefix cannot crowd out the common inflections.
+SEARCH_POSTINGS_LIMIT = int(os.getenv("SEARCH_POSTINGS_LIMIT", "1000"))
+SEARCH_MAX_EXPANSIONS = int(os.getenv("SEARCH_MAX_EXPANSIONS", "8"))
+SEARCH_EXPANSION_SCAN = int(os.getenv("SEARCH_EXPANSION_SCAN", "200"))
+SEARCH_MIN_PREFIX = 3
+SEARCH_PREFIX_WEIGHT = 0.5
+SEARCH_MAX_WORDS = 8
+SEARCH_BATCH_SIZE = 1000
+# BM25 term-frequency saturation. Lengths are compared with a fixed
+# reference instead of the live average so postings never need rescoring.
+SEARCH_K1 = 1.2
+SEARCH_B = 0.75
+SEARCH_REFERENCE_LENGTH = 150
+
+# Indexed fields with their weights, fields a search can be filtered on
+# (copied onto the postings), and the fields a search result carries
+SEARCH_SOURCES = {
+    "announcements": {
+        "fields": {"title": 3.0, "category": 1.0, "content": 1.0},
+        "filters": ["category"],
+        "result": ["title", "slug", "category", "excerpt", "cover_image", "published_at"],
+    },
+    "press": {
+        "fields": {"title": 3.0, "source": 1.0, "description": 1.0},
+        "filters": [],
+        "result": ["title", "description", "date", "source", "source_url", "cover_image"],
+    },
+    "trainings": {
+        "fields": {"title": 3.0, "instructor": 1.0, "location": 1.0, "description": 1.0},
+        "filters": [],
+        "result": ["title", "description", "date", "time", "location", "cover_image"],
+    },
+    "documents": {
+        "fields": {"title": 3.0, "tags": 2.0, "description": 1.0},
+        "filters": [],
+        "result": ["title", "description", "file_url", "tags", "created_at"],
+    },
+}
+# Folded forms, as tokenize produces them
+SEARCH_STOPWORDS = {
+    "acaba", "ama", "ancak", "bazi", "belki", "ben", "bir", "biz", "bu", "cok", "da", "daha", "de", "diye",
+    "en", "gibi", "hem", "hep", "her", "hic", "icin", "ile", "ise", "ki", "kim", "mi", "mu", "nasil", "ne",
+    "neden", "nerede", "niye", "sey", "siz", "su", "tum", "ve", "veya", "ya", "yani",
+}
+_SEARCH_TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """Folded search terms of a text, in order, without stopwords"""
+    return [token for token in _SEARCH_TOKEN.findall(fold_turkish(text)) if len(token) > 1 and token not in SEARCH_STOPWORDS]
+
+def _search_projection(collection: str) -> Dict[str, int]:
+    source = SEARCH_SOURCES[collection]
+    return {field: 1 for field in [*source["fields"], *source["filters"]]}
+
+def build_postings(collection: str, doc: Dict) -> List[Dict]:
+    """One posting per distinct term of a document, scored with BM25 saturation"""
+    source = SEARCH_SOURCES[collection]
+    weights: Dict[str, float] = {}
+    length = 0
+    for field, weight in source["fields"].items():
+        value = doc.get(field)
+        if isinstance(value, list):
+            value = " ".join(str(item) for item in value)
+        tokens = tokenize(str(value)) if value else []
+        length += len(tokens)
+        for token in tokens:
+            weights[token] = weights.get(token, 0.0) + weight
+    norm = 1 - SEARCH_B + SEARCH_B * length / SEARCH_REFERENCE_LENGTH
+    filters = {field: doc.get(field) for field in source["filters"]}
+    return [
+        {
+            "term": term,
+            "collection": collection,
+            "doc_id": doc["_id"],
+            "score": round(weight * (SEARCH_K1 + 1) / (weight + SEARCH_K1 * norm), 4),
+            **filters,
+        }
+        for term, weight in weights.items()
     ]
-    
-    # Add dynamic announcement URLs
-    announcements = await db.announcements.find({}).sort("published_at", -1).limit(50).to_list(length=50)
-    for announcement in announcements:
-        urls.append({
-            "loc": f"{base_url}/duyurular/{announcement['_id']}",
-            "priority": "0.6"
-        })
-    
-    # Generate XML
-    xml = '<?xml version="1.0" encoding="UTF-8"?>\n'
-    xml += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-    for url in urls:
-        xml += f'  <url>\n'
-        xml += f'    <loc>{url["loc"]}</loc>\n'
-        xml += f'    <priority>{url["priority"]}</priority>\n'
-        xml += f'  </url>\n'
-    xml += '</urlset>'
-    
-    return Response(content=xml, media_type="application/xml")
+
+async def _apply_term_frequencies(changes: Dict[str, int]):
+    updates = [UpdateOne({"_id": term}, {"$inc": {"df": delta}}, upsert=True) for term, delta in changes.items() if delta]
+    if updates:
+        await db.search_terms.bulk_write(updates, ordered=False)
+    dropped = [term for term, delta in changes.items() if delta < 0]
+    if dropped:
+        await db.search_terms.delete_many({"_id": {"$in": dropped}, "df": {"$lte": 0}})
+
+async def index_search_documents(collection: str, doc_ids: Union[str, ObjectId, List[Union[str, ObjectId]]]):
+    """Rewrite the postings of documents after a write.
+
+    Ids whose document no longer exists are dropped from the index, so the
+    create, update and delete handlers all call this the same way.
+    """
+    if collection not in SEARCH_SOURCES:
+        return
+    ids = [ObjectId(doc_id) for doc_id in (doc_ids if isinstance(doc_ids, list) else [doc_ids])]
+    docs = await db[collection].find({"_id": {"$in": ids}}, projection=_search_projection(collection)).to_list(length=None)
+    postings = [posting for doc in docs for posting in build_postings(collection, doc)]
+    scope = {"collection": collection, "doc_id": {"$in": ids}}
+    changes: Dict[str, int] = {}
+    async for old in db.search_postings.find(scope, projection={"_id": 0, "term": 1}):
+        changes[old["term"]] = changes.get(old["term"], 0) - 1
+    for posting in postings:
+        changes[posting["term"]] = changes.get(posting["term"], 0) + 1
+    await db.search_postings.delete_many(scope)
+    if postings:
+        await db.search_postings.insert_many(postings, ordered=False)
+    await _apply_term_frequencies(changes)
+
+async def _expand_search_word(word: str) -> List[tuple]:
+    """Index terms a query word matches, as (term, df, weight)"""
+    matches = []
+    exact = await db.search_terms.find_one({"_id": word})
+    if exact:
+        matches.append((word, exact["df"], 1.0))
+    if len(word) >= SEARCH_MIN_PREFIX:
+        # The prefix range is read in _id order, so only the first
+        # SEARCH_EXPANSION_SCAN terms are ranked by df; short prefixes with
+        # more longer terms than that are rare and carry little signal.
+        longer = db.search_terms.find({"_id": {"$gt": word, "$lt": word + "\x7f"}}).sort("_id", 1).limit(SEARCH_EXPANSION_SCAN)
+        terms = [term async for term in longer]
+        for term in sorted(terms, key=lambda t: t["df"], reverse=True)[:SEARCH_MAX_EXPANSIONS]:
+            matches.append((term["_id"], term["df"], SEARCH_PREFIX_WEIGHT))
+    return matches
+
+async def _term_postings(term: str, collections: List[str], filters: Dict) -> List[Dict]:
+    query = {"term": term, "collection": {"$in": collections}, **filters}
+    cursor = db.search_postings.find(query, projection={"_id": 0, "collection": 1, "doc_id": 1, "score": 1})
+    return await cursor.sort("score", -1).limit(SEARCH_POSTINGS_LIMIT).to_list(length=SEARCH_POSTINGS_LIMIT)
+
+async def search_documents(text: str, collections: List[str], filters: Optional[Dict] = None) -> tuple:
+    """Rank the documents matching a free-text query.
+
+    Returns ([(collection, doc_id, score)], exact). Documents matching more
+    of the query words come first, then the higher summed tf-idf. `exact`
+    is False when some term had more postings than were read; the ranking
+    and count then cover the best SEARCH_POSTINGS_LIMIT postings of it.
+    """
+    words = list(dict.fromkeys(tokenize(text)))[:SEARCH_MAX_WORDS]
+    expansions = await asyncio.gather(*(_expand_search_word(word) for word in words))
+    lookups = [(index, term, df, weight) for index, matches in enumerate(expansions) for term, df, weight in matches]
+    if not lookups:
+        return [], True
+    postings, sizes = await asyncio.gather(
+        asyncio.gather(*(_term_postings(term, collections, filters or {}) for _, term, _, _ in lookups)),
+        asyncio.gather(*(db[name].estimated_document_count() for name in SEARCH_SOURCES)),
+    )
+    total_docs = sum(sizes)
+
+    # Best-matching term per query word and document
+    contributions: Dict[tuple, Dict[int, float]] = {}
+    exact = True
+    for (index, term, df, weight), term_postings in zip(lookups, postings):
+        if len(term_postings) >= SEARCH_POSTINGS_LIMIT:
+            exact = False
+        idf = math.log(1 + max(total_docs - df + 0.5, 0.5) / (df + 0.5))
+        for posting in term_postings:
+            per_word = contributions.setdefault((posting["collection"], posting["doc_id"]), {})
+            per_word[index] = max(per_word.get(index, 0.0), weight * idf * posting["score"])
+
+    # Ties go to the newer document
+    ranked = sorted(
+        ((len(per_word), sum(per_word.values()), doc_id, collection) for (collection, doc_id), per_word in contributions.items()),
+        reverse=True
+    )
+    return [(collection, doc_id, round(score, 4)) for _, score, doc_id, collection in ranked], exact
+
+async def load_search_results(ranked: List[tuple], projections: Dict[str, Optional[Dict[str, int]]]) -> List[tuple]:
+    """Fetch ranked documents as (collection, doc, score), keeping rank order.
+
+    Ids deleted since they were indexed are skipped.
+    """
+    by_collection: Dict[str, List[ObjectId]] = {}
+    for collection, doc_id, _ in ranked:
+        by_collection.setdefault(collection, []).append(doc_id)
+    names = list(by_collection)
+    fetched = await asyncio.gather(*(
+        db[name].find({"_id": {"$in": by_collection[name]}}, projection=projections.get(name)).to_list(length=None)
+        for name in names
+    ))
+    docs = {(name, doc["_id"]): doc for name, batch in zip(names, fetched) for doc in batch}
+    return [(collection, docs[(collection, doc_id)], score) for collection, doc_id, score in ranked if (collection, doc_id) in docs]
+
+async def rebuild_search_index() -> Dict[str, Any]:
+    """Re-tokenize every searchable document from scratch"""
+    await db.search_postings.delete_many({})
+    frequencies: Dict[str, int] = {}
+    indexed = {}
+    for collection in SEARCH_SOURCES:
+        indexed[collection] = 0
+        batch = []
+        async for doc in db[collection].find({}, projection=_search_projection(collection)):
+            for posting in build_postings(collection, doc):
+                frequencies[posting["term"]] = frequencies.get(posting["term"], 0) + 1
+                batch.append(posting)
+            indexed[collection] += 1
+            if len(batch) >= SEARCH_BATCH_SIZE:
+                await db.search_postings.insert_many(batch, ordered=False)
+                batch = []
+        if batch:
+            await db.search_postings.insert_many(batch, ordered=False)
+    await db.search_terms.delete_many({})
+    terms = [{"_id": term, "df": df} for term, df in frequencies.items()]
+    for start in range(0, len(terms), SEARCH_BATCH_SIZE):
+        await db.search_terms.insert_many(terms[start:start + SEARCH_BATCH_SIZE], ordered=False)
+    await mark_changed("search")
+    return {"documents": indexed, "terms": len(terms)}
+
+@job_handler("search_rebuild")
+async def _search_rebuild_job(payload: Dict):
+    await rebuild_search_index()
+
+async def schedule_search_backfill():
+    """Queue a full index build when searchable data predates the index"""
+    if await db.search_terms.find_one({}, projection={"_id": 1}) is not None:
+        return
+    if await db.jobs.find_one({"kind": "search_rebuild", "status": {"$in": ["queued", "running"]}}, projection={"_id": 1}):
+        return
+    for collection in SEARCH_SOURCES:
+        if await db[collection].find_one({}, projection={"_id": 1}) is not None:
+            await enqueue_job("search_rebuild", {})
+            print("✅ Search index build queued")
+            return
+
+@app.get("/api/search", dependencies=[Depends(http_cache("search"))])
+@cached_response("search")
+async def search_site(q: str, collections: Optional[str] = None, limit: int = Query(20, ge=1, le=100), skip: int = Query(0, ge=0)):
+    names = [name.strip() for name in collections.split(",") if name.strip()] if collections else list(SEARCH_SOURCES)
+    if not names or any(name not in SEARCH_SOURCES for name in names):
+        raise HTTPException(status_code=400, detail="Geçersiz koleksiyon")
+    ranked, exact = await search_documents(q, names)
+    projections = {name: {field: 1 for field in SEARCH_SOURCES[name]["result"]} for name in names}
+    page = await load_search_results(ranked[skip:skip + limit], projections)
+    return {
+        "items": [{**serialize_doc(doc), "collection": collection, "score": score} for collection, doc, score in page],
+        "total": len(ranked),
+        "exact": exact,
+        "next_cursor": None
+    }
+
+# Admin: Index Management
+@app.get("/api/admin/indexes")
+async def get_index_drift():
+    return await inspect_indexes()
+
+@app.post("/api/admin/indexes/sync")
+async def sync_indexes():
+    result = await ensure_indexes()
+    return {**result, "drift": await inspect_indexes()}
+
+# Admin: Totals
+@app.post("/api/admin/totals/rebuild")
+async def rebuild_list_totals():
+    return await rebuild_totals()
+
+# Admin: Search
+@app.post("/api/admin/search/rebuild")
+async def rebuild_search():
+    return await rebuild_search_index()
+
+# Admin: Response Cache
+@app.get("/api/admin/cache")
+async def get_cache_stats():
+    return {**response_cache.stats(), "validators": validator_cache.stats()}
+
+@app.post("/api/admin/cache/clear")
+async def clear_cache():
+    response_cache.clear()
+    validator_cache.clear()
+    return {"message": "Önbellek temizlendi"}
+
+# Admin: Uploads
+@app.post("/api/admin/files/recount")
+async def recount_uploads():
+    return await rebuild_upload_refs()
+
+@app.post("/api/admin/files/gc")
+async def collect_uploads():
+    removed = await collect_unreferenced_uploads()
+    return {"removed": removed, "count": len(removed)}
+
+# Admin: Password Hashing
+@app.get("/api/admin/auth/hasher")
+async def get_password_hasher_stats():
+    return password_hasher.stats()
+
+# Admin: Users
+@app.get("/api/auth/me")
+async def get_me(current_user: Dict = Depends(get_current_user)):
+    return current_user
+
+@app.post("/api/admin/users/{email}/revoke-tokens")
+async def revoke_tokens(email: str):
+    if not await revoke_user_tokens(email):
+        raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı")
+    return {"message": "Oturumlar sonlandırıldı"}
+
+@app.get("/api/admin/auth/user-cache")
+async def get_user_cache_stats():
+    return user_cache.stats()
+
+# Admin: Email
+@app.get("/api/admin/email/pool")
+async def get_email_pool_stats():
+    return {"provider": EMAIL_PROVIDER, "smtp": smtp_pool.stats()}
+
+# Admin: Jobs
+@app.get("/api/admin/jobs")
+async def get_jobs(status: Optional[str] = None, limit: int = 50, skip: int = 0, cursor: Optional[str] = None):
+    query = {"status": status} if status else {}
+    jobs, next_cursor = await paginate(db.jobs, query, "created_at", limit, skip, cursor)
+    return {
+        "items": [serialize_doc(j) for j in jobs],
+        "next_cursor": next_cursor
+    }
+
+@app.get("/api/admin/jobs/stats")
+async def get_job_stats():
+    counts = await db.jobs.aggregate([
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]).to_list(length=None)
+    return {c["_id"]: c["count"] for c in counts}
+
+@app.post("/api/admin/jobs/{id}/retry")
+async def retry_job(id: str):
+    result = await db.jobs.update_one(
+        {"_id": ObjectId(id), "status": "dead"},
+        {"$set": {"status": "queued", "attempts": 0, "run_at": datetime.utcnow(), "updated_at": datetime.utcnow()}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Bekleyen hatalı iş bulunamadı")
+    return {"message": "İş yeniden kuyruğa alındı"}
+
+# Admin: Slow Queries
+@app.get("/api/admin/slow-queries")
+async def get_slow_queries(collection: Optional[str] = None, route: Optional[str] = None, collscan: Optional[bool] = None, limit: int = 50, skip: int = 0, cursor: Optional[str] = None):
+    query: Dict[str, Any] = {}
+    if collection:
+        query["collection"] = collection
+    if route:
+        query["route"] = route
+    if collscan is not None:
+        query["collscan"] = collscan
+    entries, next_cursor = await paginate(db.slow_queries, query, "created_at", limit, skip, cursor)
+    return {
+        "items": [serialize_doc(e) for e in entries],
+        "threshold_ms": SLOW_QUERY_MS,
+        "captured": slow_query_log.captured,
+        "suppressed": slow_query_log.suppressed,
+        "next_cursor": next_cursor
+    }
+
+# Metrics Endpoint
+@app.get("/metrics")
+async def get_metrics():
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 # Health Check
 @app.get("/api/health")
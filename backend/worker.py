@@ -0,0 +1,40 @@
+"""
+KEESO job worker
+
+Drains the Mongo-backed job queue defined in server.py so email delivery and
+image processing run outside the web workers. Run alongside the API with
+JOB_INLINE_WORKER=false set for the web processes:
+
+    python worker.py --concurrency 4
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+
+from server import supervise_worker, ensure_indexes, JOB_HANDLERS
+
+
+async def main(concurrency: int):
+    await ensure_indexes()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    base_id = f"{socket.gethostname()}-{os.getpid()}"
+    print(f"✅ Worker {base_id} started ({concurrency} slots, jobs: {', '.join(sorted(JOB_HANDLERS))})")
+    # Each slot finishes its current job before exiting on SIGTERM; a slot
+    # whose loop dies is restarted rather than taking the process down
+    await asyncio.gather(*[supervise_worker(f"{base_id}-{i}", stop) for i in range(concurrency)])
+    print(f"Worker {base_id} stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the KEESO background job worker")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("JOB_WORKER_CONCURRENCY", "2")))
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency))
@@ -0,0 +1,34 @@
+"""
+Shared pytest setup: imports backend/server.py against an in-memory
+mongomock database and a throwaway upload directory.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="keeso_uploads_"))
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+
+@pytest.fixture
+def server():
+    """The server module with a fresh database and empty caches"""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    import server as module
+
+    module.client = mongomock_motor.AsyncMongoMockClient()
+    module.db = module.client.keeso_db
+    for cache in (module.response_cache, module.user_cache, module.validator_cache):
+        cache.clear()
+    return module
+
+
+@pytest.fixture
+def client(server):
+    """An httpx client calling the app in-process (startup hooks not run)"""
+    httpx = pytest.importorskip("httpx")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://testserver")
@@ -178,7 +178,9 @@ const AnnouncementsManager = () => {
     }
   };
 
-  const handleEdit = (item) => {
+  const handleEdit = async (listItem) => {
+    // List rows carry only the card fields; load the full announcement to edit
+    const { data: item } = await apiClient.get(`/api/announcements/${listItem.id}`);
     setEditingItem(item);
     setFormData({
       title: item.title,
@@ -431,7 +433,10 @@ const VisitsManager = () => {
 
   const fetchVisits = async () => {
     try {
-      const response = await apiClient.get('/api/visits');
+      // The default list projection leaves out the gallery, which the table counts
+      const response = await apiClient.get('/api/visits', {
+        params: { fields: 'title,date,description,cover_image,gallery_images' }
+      });
       setVisits(response.data.items);
     } catch (error) {
       toast.error('Ziyaretler yüklenemedi');
@@ -496,7 +501,9 @@ const VisitsManager = () => {
     }
   };
 
-  const handleEdit = (item) => {
+  const handleEdit = async (listItem) => {
+    // List rows leave out the gallery; load the full visit to edit
+    const { data: item } = await apiClient.get(`/api/visits/${listItem.id}`);
     setEditingItem(item);
     setFormData({
       title: item.title,
@@ -115,7 +115,7 @@ const DuyurularPage = () => {
                           {announcement.title}
                         </h3>
                         <p className="text-gray-700 line-clamp-2">
-                          {announcement.content.substring(0, 200)}...
+                          {announcement.excerpt}
                         </p>
                       </div>
                       <ChevronRight size={24} className="text-gray-400 flex-shrink-0 ml-4" />
@@ -35,8 +35,7 @@ const HomePage = () => {
   const [currentSlideIndex, setCurrentSlideIndex] = useState(0);
 
   useEffect(() => {
-    fetchLatestAnnouncements();
-    fetchLatestVisits();
+    fetchHome();
     
     // Slider interval
     const interval = setInterval(() => {
@@ -46,26 +45,18 @@ const HomePage = () => {
     return () => clearInterval(interval);
   }, []);
 
-  const fetchLatestAnnouncements = async () => {
+  const fetchHome = async () => {
     try {
-      const response = await apiClient.get('/api/announcements?limit=5');
-      setAnnouncements(response.data.items);
+      const response = await apiClient.get('/api/home');
+      setAnnouncements(response.data.announcements);
+      setVisits(response.data.visits);
     } catch (error) {
-      console.error('Error fetching announcements:', error);
+      console.error('Error fetching homepage:', error);
     } finally {
       setLoading(false);
     }
   };
 
-  const fetchLatestVisits = async () => {
-    try {
-      const response = await apiClient.get('/api/visits?limit=3');
-      setVisits(response.data.items);
-    } catch (error) {
-      console.error('Error fetching visits:', error);
-    }
-  };
-
   const quickActions = [
     {
       icon: Users,
@@ -331,7 +322,7 @@ const HomePage = () => {
                     {announcement.title}
                   </h3>
                   <p className="text-gray-700 line-clamp-3 leading-relaxed">
-                    {announcement.content.substring(0, 200)}...
+                    {announcement.excerpt}
                   </p>
                 </Link>
               ))}
@@ -0,0 +1,74 @@
+"""
+CompressionMiddleware: negotiated response compression, and pass-through
+of the zero-copy and pathsend body extensions.
+"""
+
+import asyncio
+
+
+def run_asgi(app, extensions=None, accept_encoding="gzip"):
+    """Call an ASGI app for GET / and collect the messages it sends"""
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+        "extensions": extensions or {},
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+def test_zerocopysend_follows_start(server, tmp_path):
+    path = tmp_path / "report.txt"
+    path.write_bytes(b"x" * 4096)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        with open(path, "rb") as file:
+            await send({"type": "http.response.zerocopysend", "file": file, "offset": 0, "count": 4096})
+
+    sent = run_asgi(server.CompressionMiddleware(app), {"http.response.zerocopysend": {}})
+    assert [m["type"] for m in sent] == ["http.response.start", "http.response.zerocopysend"]
+    assert b"content-encoding" not in dict(sent[0]["headers"])
+
+
+def test_upload_response_zerocopy_through_middleware(server, tmp_path):
+    path = tmp_path / "photo.txt"
+    path.write_bytes(b"y" * 4096)
+    response = server.UploadResponse(path, path.stat(), {}, "text/plain")
+
+    sent = run_asgi(server.CompressionMiddleware(response), {"http.response.zerocopysend": {}})
+    assert [m["type"] for m in sent] == ["http.response.start", "http.response.zerocopysend"]
+    assert sent[0]["status"] == 200
+
+
+def test_file_response_pathsend_through_middleware(server, tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"z" * 4096)
+    response = server.FileResponse(path, media_type="text/plain")
+
+    sent = run_asgi(server.CompressionMiddleware(response), {"http.response.pathsend": {}})
+    assert [m["type"] for m in sent] == ["http.response.start", "http.response.pathsend"]
+    assert sent[1]["path"] == str(path)
+
+
+def test_large_text_body_is_compressed(server):
+    body = b"KEESO " * 1000
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    sent = run_asgi(server.CompressionMiddleware(app))
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert int(headers[b"content-length"]) == len(sent[1]["body"]) < len(body)
@@ -340,8 +340,26 @@ def test_storage_s3():
             print_result("S3 Download & Verify", False, "Downloaded content does not match")
             return False
         
+        # Direct browser-style upload through a presigned PUT URL
+        import requests
+        direct_key = f"test/poc_direct_{timestamp}_{random_id}.txt"
+        direct_content = f"KEESO POC Direct Upload - {timestamp}".encode('utf-8')
+        put_url = s3_client.generate_presigned_url(
+            'put_object',
+            Params={'Bucket': s3_bucket, 'Key': direct_key, 'ContentType': 'text/plain'},
+            ExpiresIn=900
+        )
+        put_response = requests.put(put_url, data=direct_content, headers={'Content-Type': 'text/plain'}, timeout=30)
+
+        if put_response.status_code == 200:
+            print_result("S3 Presigned PUT", True, f"Direct upload accepted: {direct_key}")
+        else:
+            print_result("S3 Presigned PUT", False, f"Unexpected status code: {put_response.status_code}")
+            return False
+
         # Clean up
         s3_client.delete_object(Bucket=s3_bucket, Key=test_key)
+        s3_client.delete_object(Bucket=s3_bucket, Key=direct_key)
         print_result("S3 Cleanup", True, "Test file removed from S3")
         
         return True
@@ -0,0 +1,27 @@
+"""
+Synthetic dataset generator: deterministic output and reruns.
+"""
+
+import asyncio
+
+import pytest
+
+
+COUNTS = {"announcements": 20, "visits": 5}
+
+
+def test_rerun_without_drop_is_refused(server):
+    import generate_dataset
+
+    async def main():
+        await generate_dataset.generate(COUNTS, 42, 10, 2, False)
+        first = [d["_id"] async for d in server.db.announcements.find({}, projection={"_id": 1})]
+        with pytest.raises(SystemExit, match="--drop"):
+            await generate_dataset.generate(COUNTS, 42, 10, 2, False)
+        await generate_dataset.generate(COUNTS, 42, 10, 2, True)
+        second = [d["_id"] async for d in server.db.announcements.find({}, projection={"_id": 1})]
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert len(first) == 20
+    assert sorted(first) == sorted(second)
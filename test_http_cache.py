@@ -0,0 +1,60 @@
+"""
+HTTP validators: ETag/Last-Modified on cached reads and 304 revalidation.
+"""
+
+import asyncio
+
+
+def test_list_revalidates_until_a_write(server, client):
+    async def main():
+        await client.post("/api/announcements", json={"title": "İlk", "content": "x", "category": "G"})
+        first = await client.get("/api/announcements")
+        etag = first.headers["etag"]
+        repeat = await client.get("/api/announcements", headers={"If-None-Match": etag})
+        weak = await client.get("/api/announcements", headers={"If-None-Match": f"W/{etag}"})
+        await client.post("/api/announcements", json={"title": "Yeni", "content": "x", "category": "G"})
+        changed = await client.get("/api/announcements", headers={"If-None-Match": etag})
+        return first, repeat, weak, changed
+
+    first, repeat, weak, changed = asyncio.run(main())
+    assert first.status_code == 200
+    assert "last-modified" in first.headers
+    assert repeat.status_code == 304 and repeat.content == b""
+    assert weak.status_code == 304
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != first.headers["etag"]
+    assert len(changed.json()["items"]) == 2
+
+
+def test_detail_etag_follows_its_document(server, client):
+    async def main():
+        ids = [
+            (await client.post("/api/announcements", json={"title": t, "content": "x", "category": "G"})).json()["id"]
+            for t in ("A", "B")
+        ]
+        etags = {id: (await client.get(f"/api/announcements/{id}")).headers["etag"] for id in ids}
+        await client.put(f"/api/announcements/{ids[0]}", json={"title": "A2", "content": "y", "category": "G"})
+        statuses = {
+            id: (await client.get(f"/api/announcements/{id}", headers={"If-None-Match": etags[id]})).status_code
+            for id in ids
+        }
+        return ids, statuses
+
+    ids, statuses = asyncio.run(main())
+    assert statuses[ids[0]] == 200
+    assert statuses[ids[1]] == 304
+
+
+def test_if_modified_since(server, client):
+    async def main():
+        await client.post("/api/announcements", json={"title": "İlk", "content": "x", "category": "G"})
+        first = await client.get("/api/announcements")
+        return await client.get("/api/announcements", headers={"If-Modified-Since": first.headers["last-modified"]})
+
+    assert asyncio.run(main()).status_code == 304
+
+
+def test_never_written_collection_has_no_last_modified(server, client):
+    response = asyncio.run(client.get("/api/announcements"))
+    assert "etag" in response.headers
+    assert "last-modified" not in response.headers
@@ -0,0 +1,29 @@
+"""
+Image variants rendered in the forkserver process pool.
+"""
+
+import asyncio
+import io
+
+import pytest
+
+
+def test_variants_render_in_the_pool(server, client):
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 400), (200, 10, 10)).save(buffer, "JPEG")
+
+    async def main():
+        saved = (await client.post("/api/upload", files={"file": ("photo.jpg", buffer.getvalue())})).json()
+        job = await server.claim_job("test")
+        await server.run_job(job)
+        return (await client.get("/api/images/variants", params={"url": saved["file_url"]})).json()
+
+    try:
+        variants = asyncio.run(main())["variants"]
+    finally:
+        if server._image_pool is not None:
+            server._image_pool.shutdown()
+            server._image_pool = None
+    assert sorted({v["width"] for v in variants}) == [320, 640]
+    assert all((server.UPLOAD_DIR / v["filename"]).exists() for v in variants)
@@ -0,0 +1,80 @@
+"""
+Job queue worker: keeps draining the queue through transient Mongo errors.
+"""
+
+import asyncio
+
+
+def test_worker_survives_claim_errors(server, monkeypatch):
+    monkeypatch.setattr(server, "JOB_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(server, "JOB_ERROR_BACKOFF_MAX", 0.05)
+    handled = []
+
+    @server.job_handler("test_echo")
+    async def echo(payload):
+        handled.append(payload["n"])
+
+    claim_job = server.claim_job
+    failures = iter([ConnectionError("connection reset")] * 2)
+
+    async def flaky_claim(worker_id):
+        error = next(failures, None)
+        if error:
+            raise error
+        return await claim_job(worker_id)
+
+    monkeypatch.setattr(server, "claim_job", flaky_claim)
+
+    async def main():
+        stop = asyncio.Event()
+        await server.enqueue_job("test_echo", {"n": 1})
+        worker = asyncio.create_task(server.run_worker("test", stop))
+        for _ in range(200):
+            if handled:
+                break
+            await asyncio.sleep(0.01)
+        stop.set()
+        await worker
+        return await server.db.jobs.find_one({"kind": "test_echo"})
+
+    job = asyncio.run(main())
+    server.JOB_HANDLERS.pop("test_echo")
+    assert handled == [1]
+    assert job["status"] == "done"
+
+
+def test_supervisor_restarts_crashed_worker(server, monkeypatch):
+    monkeypatch.setattr(server, "JOB_ERROR_BACKOFF_MAX", 0.01)
+    runs = []
+
+    async def crashing_worker(worker_id, stop):
+        runs.append(worker_id)
+        if len(runs) < 3:
+            raise RuntimeError("boom")
+        stop.set()
+
+    monkeypatch.setattr(server, "run_worker", crashing_worker)
+    asyncio.run(server.supervise_worker("test", asyncio.Event()))
+    assert runs == ["test"] * 3
+
+
+def test_excerpt_backfill_runs_once(server, monkeypatch):
+    monkeypatch.setattr(server, "EXCERPT_BACKFILL_BATCH_SIZE", 2)
+
+    async def main():
+        await server.db.announcements.insert_many([{"title": f"A{i}", "content": f"içerik {i} " * 50} for i in range(5)])
+        await server.schedule_excerpt_backfill()
+        await server.schedule_excerpt_backfill()
+        queued = await server.db.jobs.count_documents({"kind": "excerpt_backfill"})
+        job = await server.claim_job("test")
+        await server.run_job(job)
+        await server.schedule_excerpt_backfill()
+        missing = await server.db.announcements.count_documents({"excerpt": {"$exists": False}})
+        sample = await server.db.announcements.find_one({"title": "A0"})
+        return queued, missing, sample, await server.db.jobs.count_documents({"kind": "excerpt_backfill"})
+
+    queued, missing, sample, total_jobs = asyncio.run(main())
+    assert queued == 1
+    assert missing == 0
+    assert sample["excerpt"] == server.create_excerpt(sample["content"])
+    assert total_jobs == 1
@@ -0,0 +1,65 @@
+"""
+Keyset pagination: cursor encoding and stable ordering across ties.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+
+def test_cursor_round_trips_datetimes_and_numbers(server):
+    doc_id = ObjectId()
+    published = datetime(2024, 5, 1, 12, 30, 15, 250000)
+    cursor = server.encode_cursor({"_id": doc_id, "published_at": published}, "published_at")
+    assert "=" not in cursor
+    assert server.decode_cursor(cursor) == (published, doc_id)
+
+    cursor = server.encode_cursor({"_id": doc_id, "order": 7}, "order")
+    assert server.decode_cursor(cursor) == (7, doc_id)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", ""])
+def test_malformed_cursor_is_a_400(server, cursor):
+    with pytest.raises(server.HTTPException) as error:
+        server.decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_pages_break_ties_on_id(server, client):
+    same_time = datetime(2024, 1, 1)
+    docs = [
+        {"_id": ObjectId(), "title": f"A{i}", "content": "x", "category": "G", "published_at": same_time if i < 5 else datetime(2024, 1, 1 + i)}
+        for i in range(9)
+    ]
+
+    async def main():
+        await server.db.announcements.insert_many(docs)
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            page = (await client.get("/api/announcements", params=params)).json()
+            seen += [item["id"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                return seen
+
+    seen = asyncio.run(main())
+    expected = sorted(docs, key=lambda d: (d["published_at"], d["_id"]), reverse=True)
+    assert seen == [str(d["_id"]) for d in expected]
+
+
+def test_paginate_seeks_past_the_cursor(server):
+    docs = [{"_id": ObjectId(), "order": i // 3} for i in range(7)]
+
+    async def main():
+        await server.db.items.insert_many(docs)
+        first, cursor = await server.paginate(server.db.items, {}, "order", 4)
+        second, last = await server.paginate(server.db.items, {}, "order", 4, cursor=cursor)
+        return first, second, last
+
+    first, second, last = asyncio.run(main())
+    ordered = sorted(docs, key=lambda d: (d["order"], d["_id"]), reverse=True)
+    assert first + second == ordered
+    assert last is None
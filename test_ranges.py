@@ -0,0 +1,72 @@
+"""
+Upload serving: single byte ranges, 416s and If-Range.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("BYTES = 5-6", (5, 6)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+    ("bytes=-", None),
+    ("bytes=a-b", None),
+])
+def test_parse_byte_range(server, header, expected):
+    assert server.parse_byte_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-1200", "bytes=10-5"])
+def test_unsatisfiable_range_is_416(server, header):
+    with pytest.raises(server.HTTPException) as error:
+        server.parse_byte_range(header, 1000)
+    assert error.value.status_code == 416
+    assert error.value.headers["Content-Range"] == "bytes */1000"
+
+
+@pytest.fixture
+def stored_file(server):
+    data = os.urandom(1000)
+    path = server.UPLOAD_DIR / "range-test.pdf"
+    path.write_bytes(data)
+    yield "/uploads/range-test.pdf", data
+    path.unlink()
+
+
+def test_range_request_returns_206(client, stored_file):
+    url, data = stored_file
+    response = asyncio.run(client.get(url, headers={"Range": "bytes=100-199"}))
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 100-199/1000"
+    assert response.headers["content-length"] == "100"
+    assert response.content == data[100:200]
+
+
+def test_unsatisfiable_range_request_returns_416(client, stored_file):
+    url, _ = stored_file
+    response = asyncio.run(client.get(url, headers={"Range": "bytes=5000-"}))
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1000"
+
+
+def test_stale_if_range_sends_the_whole_file(client, stored_file):
+    url, data = stored_file
+
+    async def main():
+        etag = (await client.get(url)).headers["etag"]
+        fresh = await client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag})
+        stale = await client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"outdated"'})
+        return fresh, stale
+
+    fresh, stale = asyncio.run(main())
+    assert fresh.status_code == 206 and fresh.content == data[:10]
+    assert stale.status_code == 200 and stale.content == data
+    assert stale.headers["accept-ranges"] == "bytes"
@@ -0,0 +1,84 @@
+"""
+Sitemap: built through the job queue, incremental updates and recovery
+from dead rebuild jobs.
+"""
+
+import asyncio
+
+
+async def drain(server):
+    """Run every due job once"""
+    while True:
+        job = await server.claim_job("test")
+        if job is None:
+            return
+        await server.run_job(job)
+
+
+def test_cold_sitemap_is_built_by_the_queue(server, client, monkeypatch):
+    monkeypatch.setattr(server, "SITEMAP_REBUILD_DELAY", 0)
+
+    async def main():
+        first = await asyncio.gather(*[client.get("/api/sitemap.xml") for _ in range(3)])
+        jobs = await server.db.jobs.count_documents({"kind": "sitemap_rebuild"})
+        await drain(server)
+        return first, jobs, await client.get("/api/sitemap.xml")
+
+    first, jobs, ready = asyncio.run(main())
+    assert {r.status_code for r in first} == {503}
+    assert first[0].headers["retry-after"] == str(server.SITEMAP_RETRY_AFTER)
+    assert jobs == 1
+    assert ready.status_code == 200
+    assert "<urlset" in ready.text
+
+
+def test_write_updates_only_its_shard(server, client, monkeypatch):
+    monkeypatch.setattr(server, "SITEMAP_REBUILD_DELAY", 0)
+    monkeypatch.setattr(server, "SITEMAP_SHARD_SIZE", 5)
+
+    async def main():
+        ids = []
+        for i in range(8):
+            r = await client.post("/api/announcements", json={"title": f"D{i}", "content": "x", "category": "G"})
+            ids.append(r.json()["id"])
+        await server.rebuild_sitemap()
+        before = {d["_id"]: d["etag"] async for d in server.db.sitemaps.find({})}
+        await server.db.jobs.delete_many({})
+        await client.delete(f"/api/announcements/{ids[-1]}")
+        await drain(server)
+        after = {d["_id"]: d["etag"] async for d in server.db.sitemaps.find({})}
+        return before, after
+
+    before, after = asyncio.run(main())
+    assert set(before) == {"sitemap.xml", "sitemap-pages.xml", "sitemap-1.xml", "sitemap-2.xml"}
+    changed = {name for name in after if before.get(name) != after[name]}
+    assert "sitemap-1.xml" not in changed
+    assert "sitemap-2.xml" in changed
+
+
+def test_dead_rebuild_job_is_replaced(server, client, monkeypatch):
+    monkeypatch.setattr(server, "SITEMAP_REBUILD_DELAY", 0)
+
+    async def main():
+        await client.post("/api/announcements", json={"title": "A", "content": "x", "category": "G"})
+        await server.db.jobs.update_many({"kind": "sitemap_rebuild"}, {"$set": {"status": "dead"}})
+        await client.post("/api/announcements", json={"title": "B", "content": "x", "category": "G"})
+        return await server.db.jobs.count_documents({"kind": "sitemap_rebuild", "status": "queued"})
+
+    assert asyncio.run(main()) == 1
+
+
+def test_sitemap_gzip_follows_accept_encoding(server, client):
+    async def main():
+        await server.rebuild_sitemap()
+        responses = {}
+        for accept in ["gzip", "gzip;q=0", "br;q=1, gzip;q=0.5", "identity"]:
+            responses[accept] = await client.get("/api/sitemap.xml", headers={"Accept-Encoding": accept})
+        return responses
+
+    responses = asyncio.run(main())
+    assert responses["gzip"].headers["content-encoding"] == "gzip"
+    assert responses["br;q=1, gzip;q=0.5"].headers["content-encoding"] == "gzip"
+    for accept in ["gzip;q=0", "identity"]:
+        assert "content-encoding" not in responses[accept].headers
+        assert responses[accept].text.startswith("<?xml")
@@ -0,0 +1,120 @@
+"""
+Uploads: content-addressed deduplication, per-document reference counts
+and the unreferenced-file GC.
+"""
+
+import asyncio
+import os
+
+
+def upload(client, data, name="photo.pdf"):
+    return asyncio.run(client.post("/api/upload", files={"file": (name, data)})).json()
+
+
+def test_duplicate_upload_is_not_saved_again(server, client, monkeypatch):
+    saves = []
+    save = server.storage.save
+
+    async def counting_save(tmp_path, key, content_type=None):
+        saves.append(key)
+        await save(tmp_path, key, content_type)
+
+    monkeypatch.setattr(server.storage, "save", counting_save)
+    data = os.urandom(2048)
+    first = upload(client, data)
+    second = upload(client, data, "copy.pdf")
+
+    assert first["file_url"] == second["file_url"]
+    assert (first["deduplicated"], second["deduplicated"]) == (False, True)
+    assert saves == [first["filename"]]
+
+
+def test_duplicate_upload_heals_missing_file(server, client):
+    data = os.urandom(2048)
+    first = upload(client, data)
+    path = server.UPLOAD_DIR / first["filename"]
+    path.unlink()
+
+    second = upload(client, data)
+    assert second["deduplicated"]
+    assert path.read_bytes() == data
+
+
+def test_declared_oversized_upload_is_refused_before_reading(server, client, monkeypatch):
+    monkeypatch.setitem(server.UPLOAD_BODY_LIMITS, "/api/upload", 64 * 1024)
+    response = asyncio.run(client.post("/api/upload", files={"file": ("big.pdf", os.urandom(128 * 1024))}))
+    assert response.status_code == 413
+    assert not list(server.UPLOAD_DIR.glob(".*.part"))
+
+
+def test_streamed_oversized_upload_is_cut_off(server, client, monkeypatch):
+    monkeypatch.setitem(server.UPLOAD_BODY_LIMITS, "/api/upload", 64 * 1024)
+    sent = []
+
+    async def body():
+        yield b"--x\r\nContent-Disposition: form-data; name=\"file\"; filename=\"big.pdf\"\r\n\r\n"
+        for _ in range(64):
+            sent.append(1)
+            yield b"\0" * 16 * 1024
+
+    response = asyncio.run(client.post(
+        "/api/upload",
+        content=body(),
+        headers={"Content-Type": "multipart/form-data; boundary=x"}
+    ))
+    assert response.status_code == 413
+    assert response.json()["detail"] == server.UPLOAD_TOO_LARGE_DETAIL
+    assert len(sent) < 64
+
+
+def test_references_are_counted_per_document(server, client, monkeypatch):
+    monkeypatch.setattr(server, "UPLOAD_GC_GRACE_SECONDS", 0)
+    data = os.urandom(2048)
+
+    async def main():
+        saved = (await client.post("/api/upload", files={"file": ("cover.pdf", data)})).json()
+        url = saved["file_url"]
+        # Two documents share the deduplicated file
+        announcement = (await client.post("/api/announcements", json={"title": "A", "content": "x", "category": "G", "cover_image": url})).json()["id"]
+        document = (await client.post("/api/documents", json={"title": "D", "description": "x", "file_url": url})).json()["id"]
+        counts = [(await server.db.files.find_one({"_id": saved["sha256"]}))["ref_count"]]
+
+        await client.delete(f"/api/announcements/{announcement}")
+        counts.append((await server.db.files.find_one({"_id": saved["sha256"]}))["ref_count"])
+        kept = await server.collect_unreferenced_uploads()
+
+        await client.delete(f"/api/documents/{document}")
+        counts.append((await server.db.files.find_one({"_id": saved["sha256"]}))["ref_count"])
+        removed = await server.collect_unreferenced_uploads()
+        return saved, counts, kept, removed
+
+    saved, counts, kept, removed = asyncio.run(main())
+    assert counts == [2, 1, 0]
+    assert kept == []
+    assert removed == [saved["filename"]]
+    assert not (server.UPLOAD_DIR / saved["filename"]).exists()
+
+
+def test_replaced_upload_is_released(server, client, monkeypatch):
+    monkeypatch.setattr(server, "UPLOAD_GC_GRACE_SECONDS", 0)
+
+    async def main():
+        old = (await client.post("/api/upload", files={"file": ("old.pdf", os.urandom(1024))})).json()
+        new = (await client.post("/api/upload", files={"file": ("new.pdf", os.urandom(1024))})).json()
+        id = (await client.post("/api/announcements", json={"title": "A", "content": "x", "category": "G", "cover_image": old["file_url"]})).json()["id"]
+        await client.put(f"/api/announcements/{id}", json={"title": "A", "content": "x", "category": "G", "cover_image": new["file_url"]})
+        return old, new, await server.collect_unreferenced_uploads()
+
+    old, new, removed = asyncio.run(main())
+    assert removed == [old["filename"]]
+    assert (server.UPLOAD_DIR / new["filename"]).exists()
+
+
+def test_grace_period_protects_fresh_uploads(server, client):
+    async def main():
+        saved = (await client.post("/api/upload", files={"file": ("draft.pdf", os.urandom(1024))})).json()
+        return saved, await server.collect_unreferenced_uploads()
+
+    saved, removed = asyncio.run(main())
+    assert removed == []
+    assert (server.UPLOAD_DIR / saved["filename"]).exists()